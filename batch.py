@@ -0,0 +1,134 @@
+import contextlib
+import csv
+import io
+import json
+import os
+import statistics
+import sys
+import time
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+import wumpusfinal as wf
+
+__author__ = "Alicia BOULLEE, Simon DEVAUCHELLE,"
+__copyright__ = "Copyright 2020, UTC"
+__license__ = "LGPL-3.0"
+__version__ = "0.1.0"
+__maintainer__ = "Alicia BOULLEE? Simon DEVAUCHELLE"
+__email__ = "alicia.boullee@etu.utc.fr"
+__status__ = "dev"
+
+USAGE = f"""usage: python {os.sys.argv[0]} n first_seed last_seed [results.csv|results.jsonl] [workers]"""
+
+"""
+Simulation d'un grand nombre de mondes répartie sur plusieurs processus.
+
+Chaque tâche (graine, n) construit son propre WumpusWorld et sa propre base
+Gophersat, fait le parcours puis ramasse l'or, exactement comme le
+programme principal de wumpusfinal mais sans affichage. Les résultats sont
+écrits au fil de l'eau (CSV ou JSONL selon l'extension), puis résumés.
+"""
+
+FIELDS = ["seed", "n", "cost", "reward", "solves", "time", "error"]
+
+Job = Tuple[int, int]
+
+
+def simuler(job: Job) -> Dict:
+    seed, n = job
+    res = {"seed": seed, "n": n, "cost": None, "reward": None, "solves": None}
+    start = time.perf_counter()
+    try:
+        # les fonctions de wumpusfinal affichent leur progression
+        with contextlib.redirect_stdout(io.StringIO()):
+            ww = wf.WumpusWorld(n, True, seed=seed)
+            with wf.clause_initialisation(ww) as gs:
+                wf.parcours_map(wf.successeur1, wf.remove1, wf.insert1, ww, gs)
+                carte = ww.get_knowledge()
+                chemin = wf.cheminFinal_emprunte(
+                    wf.mur_liste(carte), wf.tresor_liste(carte), ww
+                )
+                wf.aller_tresor(ww, chemin)
+                res["solves"] = gs.solve_num()
+        res["cost"] = ww.get_cost()
+        res["reward"] = ww.get_reward()
+        res["error"] = ""
+    except Exception as e:
+        res["error"] = f"{type(e).__name__}: {e}"
+    res["time"] = round(time.perf_counter() - start, 6)
+
+    return res
+
+
+def executer(jobs: Iterable[Job], workers: int = 0) -> Iterator[Dict]:
+    # résultats dans l'ordre d'achèvement ; workers = 0 : un par cœur
+    jobs = list(jobs)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        yield from map(simuler, jobs)
+        return
+
+    # un monde lent ne retarde pas l'écriture de ceux déjà terminés
+    with ProcessPoolExecutor(workers) as pool:
+        futures = [pool.submit(simuler, job) for job in jobs]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def ecrire_resultats(path: str, resultats: Iterable[Dict]) -> Iterator[Dict]:
+    # écrit chaque résultat dès qu'il arrive et le renvoie à l'appelant
+    with open(path, "w", newline="") as f:
+        if path.endswith(".csv"):
+            writer = csv.DictWriter(f, FIELDS)
+            writer.writeheader()
+            for res in resultats:
+                writer.writerow(res)
+                f.flush()
+                yield res
+        else:
+            for res in resultats:
+                f.write(json.dumps(res) + "\n")
+                f.flush()
+                yield res
+
+
+def resumer(resultats: List[Dict]) -> Dict:
+    reussis = [r for r in resultats if not r["error"]]
+    res = {"worlds": len(resultats), "errors": len(resultats) - len(reussis)}
+    for champ in ("cost", "reward", "solves", "time"):
+        valeurs = [r[champ] for r in reussis]
+        if valeurs:
+            res[champ] = {
+                "mean": statistics.fmean(valeurs),
+                "median": statistics.median(valeurs),
+                "min": min(valeurs),
+                "max": max(valeurs),
+                "total": sum(valeurs),
+            }
+
+    return res
+
+
+def run(n: int, seeds: Iterable[int], path: str = "", workers: int = 0) -> Dict:
+    resultats = executer(((seed, n) for seed in seeds), workers)
+    if path:
+        resultats = ecrire_resultats(path, resultats)
+
+    return resumer(list(resultats))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (4, 5, 6):
+        print(USAGE)
+        sys.exit(1)
+
+    n, first, last = map(int, sys.argv[1:4])
+    path = sys.argv[4] if len(sys.argv) > 4 else ""
+    workers = int(sys.argv[5]) if len(sys.argv) > 5 else 0
+
+    start = time.perf_counter()
+    resume = run(n, range(first, last + 1), path, workers)
+    resume["wall_time"] = round(time.perf_counter() - start, 3)
+    print(json.dumps(resume, indent=2))
@@ -0,0 +1,134 @@
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from wumpusfinal import Case, course_final
+
+"""
+Compare l'A* à tas binaire de wumpusfinal.course_final avec l'ancienne
+version à liste ouverte triée par insertion, sur des grilles aléatoires.
+
+usage: python benchmarks/bench_astar.py [n ...]
+"""
+
+
+# --- ancienne version de course_final, conservée pour comparaison ---
+
+
+def effectuer_analyse(pos, case, end):
+    case_analyse = Case(pos)
+    case_analyse.calcul(case, end)
+    return case_analyse
+
+
+def effectuer_analyse2(pos, case, openList):
+    for i in openList:
+        if i.pos == pos:
+            if (case.g + 10) < i.g:
+                i.g = case.g + 10
+                i.parent = case
+            return i
+
+
+def sort(openList, case):
+    old_size = len(openList)
+    indice = 0
+    if case.pos in liste_position_c(openList):
+        return openList
+    for i in openList:
+        if case.f < i.f and indice != 0:
+            openList.insert(indice, case)
+            return openList
+        indice = indice + 1
+    if old_size == len(openList):
+        openList.append(case)
+    return openList
+
+
+def liste_position_c(l):
+    return [i.pos for i in l]
+
+
+def succ(case, end, openList, pos_closelist, l_wall, n):
+    i = case.pos[0]
+    j = case.pos[1]
+    l_analyse = []
+    l_analyse_again = []
+    for a, b in ((i + 1, j), (i - 1, j), (i, j + 1), (i, j - 1)):
+        if 0 <= a < n and 0 <= b < n:
+            if [a, b] not in l_wall and [a, b] not in pos_closelist:
+                if [a, b] not in liste_position_c(openList):
+                    l_analyse.append([a, b])
+                else:
+                    l_analyse_again.append([a, b])
+
+    for i in l_analyse:
+        openList = sort(openList, effectuer_analyse(i, case, end))
+    for i in l_analyse_again:
+        openList = sort(openList, effectuer_analyse2(i, case, openList))
+    return openList
+
+
+def course_final_liste(start, end, l_wall, n):
+    openList = [start]
+    closelist = []
+    res = []
+    current_case = start
+
+    while end.pos != current_case.pos:
+        current_case = openList[0]
+        openList = succ(current_case, end, openList, liste_position_c(closelist), l_wall, n)
+        closelist.append(openList.pop(0))
+
+        if len(openList) == 0 and end.pos != current_case.pos:
+            return res
+
+    while current_case.parent is not None:
+        res.append(current_case.pos)
+        current_case = current_case.parent
+    res.append(start.pos)
+    return res
+
+
+# --- banc d'essai ---
+
+
+def random_grid(n, wall_rate, rand):
+    l_wall = [
+        [i, j]
+        for i in range(n)
+        for j in range(n)
+        if (i, j) not in ((0, 0), (n - 1, n - 1)) and rand.random() < wall_rate
+    ]
+    return l_wall
+
+
+def timed(f):
+    start = time.perf_counter()
+    res = f()
+    return res, time.perf_counter() - start
+
+
+def bench(n, wall_rate=0.2, seed=0, compare=True):
+    rand = random.Random(seed)
+    l_wall = random_grid(n, wall_rate, rand)
+    start, end = [0, 0], [n - 1, n - 1]
+
+    new, t_new = timed(lambda: course_final(Case(start), Case(end), l_wall, n))
+    line = f"n={n:>4}  heap A* {t_new * 1000:10.2f} ms  path {len(new):>5}"
+
+    if compare:
+        old, t_old = timed(lambda: course_final_liste(Case(start), Case(end), l_wall, n))
+        line += f"  former A* {t_old * 1000:10.2f} ms  path {len(old):>5}"
+
+    print(line)
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [10, 20, 50, 100]
+    for n in sizes:
+        # l'ancienne version devient trop lente au-delà de 100x100
+        bench(n, compare=n <= 100)
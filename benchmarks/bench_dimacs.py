@@ -0,0 +1,90 @@
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from gopherpysat import Gophersat, ClauseArena
+
+"""
+Compare la sérialisation DIMACS par concaténation (ancienne version de
+Gophersat.dimacs) avec l'écriture en flux de write_dimacs.
+
+usage: python benchmarks/bench_dimacs.py [nb_clauses ...]
+"""
+
+
+def dimacs_concat(var_num, clauses):
+    s = "c automatically generated by gopherpysat\n"
+    s += f"p cnf {var_num} {len(clauses)}\n"
+
+    for clause in clauses:
+        for lit in clause:
+            s += f"{lit} "
+        s += "0\n"
+
+    return s
+
+
+def random_clauses(nb, var_num, rand):
+    return [
+        [rand.choice([-1, 1]) * rand.randint(1, var_num) for _ in range(rand.randint(1, 5))]
+        for _ in range(nb)
+    ]
+
+
+def list_nbytes(clauses):
+    # taille des listes et des entiers (les petits entiers sont partagés)
+    return sys.getsizeof(clauses) + sum(
+        sys.getsizeof(c) + sum(sys.getsizeof(l) for l in c if abs(l) > 256)
+        for c in clauses
+    )
+
+
+def best_of(f, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        f()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench(nb):
+    rand = random.Random(nb)
+    var_num = max(nb // 4, 10)
+    clauses = random_clauses(nb, var_num, rand)
+    var_num = max(abs(lit) for clause in clauses for lit in clause)
+
+    gs = Gophersat()
+    for clause in clauses:
+        gs.push_clause(clause)
+
+    frozen = Gophersat()
+    for clause in clauses:
+        frozen.push_clause(clause)
+    frozen.freeze()
+
+    with open(os.devnull, "w") as f:
+        t_concat = best_of(lambda: f.write(dimacs_concat(var_num, clauses)))
+        t_stream = best_of(lambda: gs.write_dimacs(f))
+        t_frozen = best_of(lambda: frozen.write_dimacs(f))
+
+    assert dimacs_concat(var_num, clauses) == gs.dimacs()
+    arena = ClauseArena()
+    for clause in clauses:
+        arena.push(clause)
+
+    print(
+        f"{nb:>8} clauses  concat {t_concat * 1000:9.2f} ms  "
+        f"write_dimacs {t_stream * 1000:9.2f} ms  "
+        f"frozen {t_frozen * 1000:9.2f} ms  "
+        f"memory list {list_nbytes(clauses) // 1024} KiB / arena {arena.nbytes() // 1024} KiB"
+    )
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [1000, 10000, 100000]
+    for nb in sizes:
+        bench(nb)
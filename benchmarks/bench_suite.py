@@ -0,0 +1,194 @@
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import wumpuscnf
+import wumpusfinal as wf
+
+"""
+Banc d'essai de référence : chaque étape du programme est chronométrée
+séparément sur des mondes à graine fixe, pour plusieurs tailles de carte.
+
+- random_world, clause_initialisation, parcours_map : sur le monde de la graine ;
+- Gophersat.solve : résolution de la base complète obtenue après le parcours ;
+- course_final : de (0, 0) à la case libre la plus éloignée de la carte connue ;
+- cheminFinal_emprunte : ramassage de l'or sur la carte connue.
+
+Pour chaque taille on garde la médiane sur les graines et le pic mémoire
+(tracemalloc, mesuré lors d'un passage à part sur la première graine pour
+ne pas fausser les temps). compare signale les étapes plus lentes que la
+référence au-delà d'un seuil relatif.
+
+usage: python benchmarks/bench_suite.py run [resultats.json] [n ...]
+       python benchmarks/bench_suite.py compare reference.json nouveau.json [seuil]
+"""
+
+USAGE = """usage: python benchmarks/bench_suite.py run [resultats.json] [n ...]
+       python benchmarks/bench_suite.py compare reference.json nouveau.json [seuil]"""
+
+SIZES = [4, 10, 20, 50]
+SEEDS = [0, 1, 2]
+STEPS = [
+    "random_world",
+    "clause_initialisation",
+    "parcours_map",
+    "Gophersat.solve",
+    "course_final",
+    "cheminFinal_emprunte",
+]
+
+# écart relatif toléré, et écart absolu (s) en dessous duquel on ignore le bruit
+THRESHOLD = 0.2
+MIN_DELTA = 0.001
+
+
+def step(mesures, nom, f, memoire):
+    if memoire:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    res = f()
+    duree = time.perf_counter() - start
+    if memoire:
+        mesures[nom] = tracemalloc.get_traced_memory()[1] - base
+    else:
+        mesures[nom] = duree
+    return res
+
+
+def scenario(n, seed, memoire=False):
+    mesures = {}
+    # la base de règles est regénérée à chaque fois pour mesurer sa construction
+    wumpuscnf._templates.clear()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        world = step(mesures, "random_world", lambda: wf.random_world(n, seed=seed), memoire)
+        ww = wf.WumpusWorld(n, world=world)
+        gs = step(mesures, "clause_initialisation", lambda: wf.clause_initialisation(ww), memoire)
+        step(
+            mesures,
+            "parcours_map",
+            lambda: wf.parcours_map(wf.successeur1, wf.remove1, wf.insert1, ww, gs),
+            memoire,
+        )
+
+        def solve():
+            gs.changed()
+            return gs.solve()
+
+        step(mesures, "Gophersat.solve", solve, memoire)
+        gs.close()
+
+        carte = ww.get_knowledge()
+        l_wall = wf.mur_liste(carte)
+        murs = set(map(tuple, l_wall))
+        fin = max(
+            ((i, j) for i in range(n) for j in range(n) if (i, j) not in murs),
+            key=lambda c: c[0] + c[1],
+        )
+        step(
+            mesures,
+            "course_final",
+            lambda: wf.course_final(wf.Case([0, 0]), wf.Case(list(fin)), l_wall, n),
+            memoire,
+        )
+        l_gold = wf.tresor_liste(carte)
+        step(
+            mesures,
+            "cheminFinal_emprunte",
+            lambda: wf.cheminFinal_emprunte(l_wall, l_gold, ww),
+            memoire,
+        )
+
+    return mesures
+
+
+def run(sizes=SIZES, seeds=SEEDS):
+    res = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": wf.gophersat_backend,
+            "seeds": list(seeds),
+            "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+        },
+        "results": {},
+    }
+
+    for n in sizes:
+        temps = {nom: [] for nom in STEPS}
+        for seed in seeds:
+            for nom, duree in scenario(n, seed).items():
+                temps[nom].append(duree)
+
+        tracemalloc.start()
+        pics = scenario(n, seeds[0], memoire=True)
+        tracemalloc.stop()
+
+        res["results"][str(n)] = {
+            nom: {
+                "median": statistics.median(temps[nom]),
+                "times": temps[nom],
+                "peak": pics[nom],
+            }
+            for nom in STEPS
+        }
+        for nom in STEPS:
+            r = res["results"][str(n)][nom]
+            print(
+                f"n={n:>3}  {nom:<22} {r['median'] * 1000:12.2f} ms"
+                f"  peak {r['peak'] / 1024:10.1f} KiB"
+            )
+
+    return res
+
+
+def compare(reference, nouveau, threshold=THRESHOLD):
+    # renvoie les étapes plus lentes que la référence
+    regressions = []
+    for n, etapes in nouveau["results"].items():
+        for nom, r in etapes.items():
+            ref = reference["results"].get(n, {}).get(nom)
+            if ref is None:
+                continue
+            a, b = ref["median"], r["median"]
+            ratio = b / a if a > 0 else float("inf")
+            marque = ""
+            if b - a > MIN_DELTA and ratio > 1 + threshold:
+                marque = "  REGRESSION"
+                regressions.append((int(n), nom, a, b))
+            print(
+                f"n={n:>3}  {nom:<22} {a * 1000:12.2f} ms -> {b * 1000:12.2f} ms"
+                f"  x{ratio:6.2f}{marque}"
+            )
+
+    return regressions
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args[:1] == ["compare"] and len(args) in (3, 4):
+        with open(args[1]) as f:
+            reference = json.load(f)
+        with open(args[2]) as f:
+            nouveau = json.load(f)
+        threshold = float(args[3]) if len(args) == 4 else THRESHOLD
+        sys.exit(1 if compare(reference, nouveau, threshold) else 0)
+    elif args[:1] == ["run"]:
+        path = args[1] if len(args) > 1 and not args[1].isdigit() else ""
+        sizes = [int(a) for a in args[1 + bool(path) :]] or SIZES
+        res = run(sizes)
+        if path:
+            with open(path, "w") as f:
+                json.dump(res, f, indent=2)
+    else:
+        print(USAGE)
+        sys.exit(1)
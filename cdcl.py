@@ -0,0 +1,385 @@
+import heapq
+
+from typing import List, Optional, Tuple
+
+__author__ = "Alicia BOULLEE, Simon DEVAUCHELLE,"
+__copyright__ = "Copyright 2020, UTC"
+__license__ = "LGPL-3.0"
+__version__ = "0.1.0"
+__maintainer__ = "Alicia BOULLEE? Simon DEVAUCHELLE"
+__email__ = "alicia.boullee@etu.utc.fr"
+__status__ = "dev"
+
+"""
+Solveur CDCL en pur Python, utilisable comme backend en mémoire de Gophersat.
+
+Littéraux internes : le littéral DIMACS x est codé 2 * |x| + (x < 0), la
+négation d'un code c est donc c ^ 1.
+"""
+
+UNDEF = 0
+TRUE = 1
+FALSE = -1
+
+RESTART_BASE = 100
+VAR_DECAY = 0.95
+LEARNT_RATIO = 3
+
+
+def luby(i: int) -> int:
+    # suite de Luby (1, 1, 2, 1, 1, 2, 4, ...), indexée à partir de 0
+    size, seq = 1, 0
+    while size < i + 1:
+        seq += 1
+        size = 2 * size + 1
+    while size - 1 != i:
+        size = (size - 1) >> 1
+        seq -= 1
+        i = i % size
+    return 1 << seq
+
+
+def to_code(lit: int) -> int:
+    return 2 * lit if lit > 0 else -2 * lit + 1
+
+
+def to_lit(code: int) -> int:
+    return -(code >> 1) if code & 1 else code >> 1
+
+
+class CDCLSolver:
+    def __init__(self):
+        self.__var_num = 0
+        self.__originals: List[List[int]] = []
+        self.reset()
+
+    def reset(self):
+        self.__unsat = False
+        self.__clauses: List[List[int]] = []
+        self.__learnts: List[List[int]] = []
+        self.__watches: List[List[List[int]]] = [[], []]
+        self.__values: List[int] = [UNDEF, UNDEF]
+        self.__level: List[int] = [0]
+        self.__reason: List[Optional[List[int]]] = [None]
+        self.__activity: List[float] = [0.0]
+        self.__polarity: List[int] = [FALSE]
+        self.__seen: List[int] = [0]
+        self.__heap: List[Tuple[float, int]] = []
+        self.__var_inc = 1.0
+        self.__trail: List[int] = []
+        self.__trail_lim: List[int] = []
+        self.__qhead = 0
+        self.__conflicts = 0
+
+        var_num, self.__var_num = self.__var_num, 0
+        self.set_var_num(var_num)
+        for clause in self.__originals:
+            self.__attach_original(clause)
+
+    def set_var_num(self, var_num: int):
+        while self.__var_num < var_num:
+            self.__var_num += 1
+            self.__watches.append([])
+            self.__watches.append([])
+            self.__values.append(UNDEF)
+            self.__values.append(UNDEF)
+            self.__level.append(0)
+            self.__reason.append(None)
+            self.__activity.append(0.0)
+            self.__polarity.append(FALSE)
+            self.__seen.append(0)
+            heapq.heappush(self.__heap, (0.0, self.__var_num))
+
+    def var_num(self) -> int:
+        return self.__var_num
+
+    def clause_num(self) -> int:
+        return len(self.__originals)
+
+    # --- gestion des clauses ---
+
+    def add_clause(self, clause: List[int]):
+        self.__originals.append(clause)
+        self.__attach_original(clause)
+
+    def pop_clause(self, count: int = 1):
+        # les clauses apprises peuvent dépendre des clauses retirées :
+        # on repart de la base originale
+        count = min(count, len(self.__originals))
+        if count > 0:
+            del self.__originals[-count:]
+            self.reset()
+
+    def __attach_original(self, clause: List[int]):
+        self.set_var_num(max(map(abs, clause), default=0))
+        if self.__unsat:
+            return
+
+        self.__cancel_until(0)
+
+        codes = []
+        for lit in clause:
+            code = to_code(lit)
+            if code ^ 1 in codes:
+                return
+            if code not in codes:
+                codes.append(code)
+
+        values = self.__values
+        if any(values[c] == TRUE for c in codes):
+            return
+        codes = [c for c in codes if values[c] != FALSE]
+
+        if len(codes) == 0:
+            self.__unsat = True
+        elif len(codes) == 1:
+            self.__enqueue(codes[0], None)
+        else:
+            self.__clauses.append(codes)
+            self.__watch(codes)
+
+    def __watch(self, clause: List[int]):
+        self.__watches[clause[0] ^ 1].append(clause)
+        self.__watches[clause[1] ^ 1].append(clause)
+
+    # --- affectations ---
+
+    def __decision_level(self) -> int:
+        return len(self.__trail_lim)
+
+    def __enqueue(self, code: int, reason: Optional[List[int]]):
+        v = code >> 1
+        self.__values[code] = TRUE
+        self.__values[code ^ 1] = FALSE
+        self.__level[v] = len(self.__trail_lim)
+        self.__reason[v] = reason
+        self.__trail.append(code)
+
+    def __cancel_until(self, level: int):
+        if len(self.__trail_lim) <= level:
+            return
+
+        values = self.__values
+        reason = self.__reason
+        polarity = self.__polarity
+        activity = self.__activity
+        heap = self.__heap
+        limit = self.__trail_lim[level]
+        for code in reversed(self.__trail[limit:]):
+            v = code >> 1
+            values[code] = UNDEF
+            values[code ^ 1] = UNDEF
+            reason[v] = None
+            polarity[v] = FALSE if code & 1 else TRUE
+            heapq.heappush(heap, (-activity[v], v))
+
+        del self.__trail[limit:]
+        del self.__trail_lim[level:]
+        self.__qhead = min(self.__qhead, limit)
+
+    def __propagate(self) -> Optional[List[int]]:
+        values = self.__values
+        watches = self.__watches
+        trail = self.__trail
+
+        while self.__qhead < len(trail):
+            code = trail[self.__qhead]
+            self.__qhead += 1
+            false_lit = code ^ 1
+
+            ws = watches[code]
+            watches[code] = kept = []
+            n = len(ws)
+            k = 0
+            while k < n:
+                clause = ws[k]
+                k += 1
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], false_lit
+
+                first = clause[0]
+                if values[first] == TRUE:
+                    kept.append(clause)
+                    continue
+
+                for m in range(2, len(clause)):
+                    if values[clause[m]] != FALSE:
+                        clause[1], clause[m] = clause[m], false_lit
+                        watches[clause[1] ^ 1].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if values[first] == FALSE:
+                        kept.extend(ws[k:])
+                        self.__qhead = len(trail)
+                        return clause
+                    self.__enqueue(first, clause)
+
+        return None
+
+    # --- apprentissage ---
+
+    def __bump(self, v: int):
+        activity = self.__activity
+        activity[v] += self.__var_inc
+        if activity[v] > 1e100:
+            for i in range(1, self.__var_num + 1):
+                activity[i] *= 1e-100
+            self.__var_inc *= 1e-100
+            self.__heap = [(-activity[i], i) for i in range(1, self.__var_num + 1)]
+            heapq.heapify(self.__heap)
+        elif self.__values[2 * v] == UNDEF:
+            heapq.heappush(self.__heap, (-activity[v], v))
+
+    def __analyze(self, conflict: List[int]) -> Tuple[List[int], int]:
+        seen = self.__seen
+        level = self.__level
+        trail = self.__trail
+        current = self.__decision_level()
+
+        learnt = [0]
+        counter = 0
+        code = None
+        index = len(trail) - 1
+        clause = conflict
+
+        while True:
+            start = 0 if code is None else 1
+            for q in clause[start:]:
+                v = q >> 1
+                if not seen[v] and level[v] > 0:
+                    seen[v] = 1
+                    self.__bump(v)
+                    if level[v] >= current:
+                        counter += 1
+                    else:
+                        learnt.append(q)
+
+            while not seen[trail[index] >> 1]:
+                index -= 1
+            code = trail[index]
+            index -= 1
+            clause = self.__reason[code >> 1]
+            seen[code >> 1] = 0
+            counter -= 1
+            if counter == 0:
+                break
+
+        learnt[0] = code ^ 1
+        for q in learnt[1:]:
+            seen[q >> 1] = 0
+
+        if len(learnt) == 1:
+            return learnt, 0
+
+        best = 1
+        for m in range(2, len(learnt)):
+            if level[learnt[m] >> 1] > level[learnt[best] >> 1]:
+                best = m
+        learnt[1], learnt[best] = learnt[best], learnt[1]
+
+        return learnt, level[learnt[1] >> 1]
+
+    def __reduce_learnts(self):
+        locked = set(id(r) for r in self.__reason if r is not None)
+        self.__learnts.sort(key=len)
+        half = len(self.__learnts) // 2
+        self.__learnts = self.__learnts[:half] + [
+            c for c in self.__learnts[half:] if id(c) in locked
+        ]
+
+        self.__watches = [[] for _ in range(2 * self.__var_num + 2)]
+        for clause in self.__clauses:
+            self.__watch(clause)
+        for clause in self.__learnts:
+            self.__watch(clause)
+
+    def __pick_branch(self) -> int:
+        heap = self.__heap
+        values = self.__values
+        while heap:
+            _, v = heapq.heappop(heap)
+            if values[2 * v] == UNDEF:
+                return 2 * v + (1 if self.__polarity[v] == FALSE else 0)
+
+        # tas vidé par des entrées périmées : on le reconstruit
+        free = [v for v in range(1, self.__var_num + 1) if values[2 * v] == UNDEF]
+        if not free:
+            return 0
+        self.__heap = [(-self.__activity[v], v) for v in free]
+        heapq.heapify(self.__heap)
+        return self.__pick_branch()
+
+    # --- résolution ---
+
+    def solve(self, assumptions: List[int] = []) -> Tuple[bool, List[int]]:
+        self.set_var_num(max([0] + [abs(lit) for lit in assumptions]))
+        if self.__unsat:
+            return False, []
+
+        self.__cancel_until(0)
+        if self.__propagate() is not None:
+            self.__unsat = True
+            return False, []
+
+        codes = [to_code(lit) for lit in assumptions]
+        max_learnts = max(len(self.__clauses) // LEARNT_RATIO, 1000)
+        restart = 0
+        budget = RESTART_BASE * luby(restart)
+
+        while True:
+            conflict = self.__propagate()
+            if conflict is not None:
+                self.__conflicts += 1
+                budget -= 1
+                if self.__decision_level() == 0:
+                    self.__unsat = True
+                    return False, []
+
+                learnt, back_level = self.__analyze(conflict)
+                self.__cancel_until(back_level)
+                if len(learnt) == 1:
+                    self.__enqueue(learnt[0], None)
+                else:
+                    self.__learnts.append(learnt)
+                    self.__watch(learnt)
+                    self.__enqueue(learnt[0], learnt)
+                self.__var_inc /= VAR_DECAY
+                continue
+
+            if budget <= 0:
+                restart += 1
+                budget = RESTART_BASE * luby(restart)
+                self.__cancel_until(0)
+                if len(self.__learnts) > max_learnts:
+                    self.__reduce_learnts()
+                    max_learnts += max_learnts // 10
+                continue
+
+            decision = 0
+            while self.__decision_level() < len(codes):
+                code = codes[self.__decision_level()]
+                if self.__values[code] == TRUE:
+                    self.__trail_lim.append(len(self.__trail))
+                elif self.__values[code] == FALSE:
+                    self.__cancel_until(0)
+                    return False, []
+                else:
+                    decision = code
+                    break
+
+            if decision == 0:
+                decision = self.__pick_branch()
+                if decision == 0:
+                    model = [
+                        v if self.__values[2 * v] == TRUE else -v
+                        for v in range(1, self.__var_num + 1)
+                    ]
+                    self.__cancel_until(0)
+                    return True, model
+
+            self.__trail_lim.append(len(self.__trail))
+            self.__enqueue(decision, None)
+
+    def close(self):
+        pass
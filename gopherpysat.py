@@ -1,10 +1,17 @@
+import io
 import os
 import sys
 import subprocess
 import uuid
 import tempfile
+import time
+import weakref
 
-from typing import List, Dict
+from array import array
+from collections import OrderedDict
+from typing import Callable, List, Dict, Optional, Tuple, Union, TextIO, BinaryIO, Iterator
+
+from cdcl import CDCLSolver
 
 __author__ = "Sylvain Lagrue"
 __copyright__ = "Copyright 2019, 2020 UTC"
@@ -14,7 +21,7 @@ __maintainer__ = "Sylvain Lagrue"
 __email__ = "sylvain.lagrue@utc.fr"
 __status__ = "dev"
 
-USAGE = f"""usage: python {os.sys.argv[0]} cnf_file"""
+USAGE = f"""usage: python {os.sys.argv[0]} cnf_file [exec|cdcl]"""
 
 """
 TODO :
@@ -24,21 +31,505 @@ TODO :
 """
 
 
+HEADER_WIDTH = 10
+REPAIR_BUDGET = 30
+DIMACS_CHUNK = 4096
+ARENA_MAGIC = b"GPSA\x01"
+ENTAILMENT_CACHE_SIZE = 4096
+BACKENDS = ("exec", "cdcl")
+
+
+def dimacs_text(clauses: List[List[int]]) -> str:
+    if not clauses:
+        return ""
+
+    return " 0\n".join([" ".join(map(str, clause)) for clause in clauses]) + " 0\n"
+
+
+def dimacs_header(var_num: int, clause_num: int) -> str:
+    return f"c automatically generated by gopherpysat\np cnf {var_num} {clause_num}\n"
+
+
+def temporary_cnf() -> str:
+    # chemin d'un fichier DIMACS temporaire, à supprimer par l'appelant
+    return f"{os.path.join(tempfile.gettempdir(), uuid.uuid4().hex)}.cnf"
+
+
+def write_dimacs(
+    path: str, var_num: int, clauses: List[List[int]], assumptions: List[int] = []
+):
+    # les hypothèses sont écrites comme clauses unitaires
+    with open(path, "w", newline="\n") as f:
+        f.write(dimacs_header(var_num, len(clauses) + len(assumptions)))
+        f.write(dimacs_text(clauses + [[lit] for lit in assumptions]))
+
+
+def parse_gophersat(out: str) -> Tuple[bool, List[int]]:
+    lines = out.splitlines()
+
+    sat = lines[1][2:] == "SATISFIABLE"
+    model = list(map(int, lines[2][2:].split(" ")))[:-1] if sat else []
+
+    return sat, model
+
+
+def renumber(
+    clauses: List[List[int]], assumptions: List[int] = []
+) -> Tuple[List[List[int]], List[int], List[int]]:
+    # variables renumérotées de 1 à k dans l'ordre d'apparition ; names[k]
+    # redonne la variable d'origine
+    index: Dict[int, int] = {}
+    names = [0]
+    for c in clauses + [assumptions]:
+        for l in c:
+            if abs(l) not in index:
+                index[abs(l)] = len(names)
+                names.append(abs(l))
+
+    def renum(c):
+        return [index[l] if l > 0 else -index[-l] for l in c]
+
+    return [renum(c) for c in clauses], renum(assumptions), names
+
+
+def unnumber(model: List[int], names: List[int]) -> List[int]:
+    return [names[l] if l > 0 else -names[-l] for l in model]
+
+
+def run_gophersat(
+    executable: str, filename: str, stats: Optional["SolverStats"] = None
+) -> Tuple[bool, List[int]]:
+    if stats is not None:
+        start = time.perf_counter()
+
+    res = subprocess.run(
+        [executable, filename], stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+
+    if stats is not None:
+        spawned = time.perf_counter()
+        stats.time("spawn", spawned - start)
+
+    err = res.stderr.decode("utf8")
+    if err != "":
+        print("error:", err)
+        sys.exit(2)
+
+    sat, model = parse_gophersat(res.stdout.decode("utf8"))
+
+    if stats is not None:
+        stats.time("parse", time.perf_counter() - spawned)
+
+    return sat, model
+
+
+# Mesures du solveur : compteurs, durées par phase (serialize : écriture
+# DIMACS, spawn : exécution de gophersat, solve : solveur en mémoire, parse :
+# lecture de la réponse, total : un appel complet), taille de chaque requête
+# et fonctions appelées à chaque résolution. Sans objet SolverStats, rien
+# n'est mesuré.
+class SolverStats:
+    def __init__(self):
+        self.counters: Dict[str, int] = {}
+        self.timings: Dict[str, List[float]] = {}
+        self.sizes: List[Tuple[int, int]] = []
+        self.hooks: List[Callable[[str, Dict], None]] = []
+
+    def count(self, name: str, k: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + k
+
+    def time(self, phase: str, seconds: float):
+        self.timings.setdefault(phase, []).append(seconds)
+
+    def query(self, event: str, var_num: int, clause_num: int, sat: bool, seconds: float):
+        self.count(event)
+        self.time("total", seconds)
+        self.sizes.append((var_num, clause_num))
+        for hook in self.hooks:
+            hook(
+                event,
+                {"variables": var_num, "clauses": clause_num, "sat": sat, "seconds": seconds},
+            )
+
+    def histogram(self, phase: str = "total") -> Dict[int, int]:
+        # nombre d'appels par tranche de durée : clé k pour [2^(k-1), 2^k[ µs
+        res: Dict[int, int] = {}
+        for seconds in self.timings.get(phase, []):
+            k = max(0, int(seconds * 1e6)).bit_length()
+            res[k] = res.get(k, 0) + 1
+        return dict(sorted(res.items()))
+
+    def summary(self) -> Dict:
+        return {
+            "counters": dict(self.counters),
+            "timings": {
+                phase: {"calls": len(t), "total": sum(t), "max": max(t)}
+                for phase, t in self.timings.items()
+            },
+            "max_variables": max((v for v, _ in self.sizes), default=0),
+            "max_clauses": max((c for _, c in self.sizes), default=0),
+        }
+
+    def reset(self):
+        self.counters.clear()
+        self.timings.clear()
+        self.sizes.clear()
+
+
+# Session longue : le fichier DIMACS reste ouvert, les clauses y sont ajoutées
+# (ou tronquées) au fil de l'eau et seul l'en-tête est réécrit à chaque solve.
+class GophersatSession:
+    def __init__(self, gophersat_exec: str = "gophersat", stats: Optional[SolverStats] = None):
+        self.__executable = gophersat_exec
+        self.__stats = stats
+        self.__var_num = 0
+        self.__offsets: List[int] = []
+
+        self.__file_name = temporary_cnf()
+        self.__file = open(self.__file_name, "w+", newline="\n")
+        self.__file.write("c automatically generated by gopherpysat\n")
+        self.__header_offset = self.__file.tell()
+        self.__write_header(0, 0)
+        self.__finalizer = weakref.finalize(
+            self, GophersatSession.__cleanup, self.__file, self.__file_name
+        )
+
+    @staticmethod
+    def __cleanup(f, file_name: str):
+        f.close()
+        if os.path.exists(file_name):
+            os.remove(file_name)
+
+    def __write_header(self, var_num: int, clause_num: int):
+        self.__file.seek(self.__header_offset)
+        self.__file.write(
+            f"p cnf {var_num:<{HEADER_WIDTH}} {clause_num:<{HEADER_WIDTH}}\n"
+        )
+
+    def set_var_num(self, var_num: int):
+        self.__var_num = max(self.__var_num, var_num)
+
+    def add_clause(self, clause: List[int]):
+        self.__file.seek(0, os.SEEK_END)
+        self.__offsets.append(self.__file.tell())
+        self.__file.write(dimacs_text([clause]))
+
+        m = max(map(abs, clause), default=0)
+        if m > self.__var_num:
+            self.__var_num = m
+
+    def pop_clause(self, count: int = 1):
+        count = min(count, len(self.__offsets))
+        if count > 0:
+            self.__file.truncate(self.__offsets[-count])
+            del self.__offsets[-count:]
+
+    def clause_num(self) -> int:
+        return len(self.__offsets)
+
+    def solve(self, assumptions: List[int] = []) -> Tuple[bool, List[int]]:
+        # les hypothèses sont écrites comme clauses unitaires temporaires
+        if self.__stats is not None:
+            start = time.perf_counter()
+        end = self.__file.seek(0, os.SEEK_END)
+        for lit in assumptions:
+            self.__file.write(f"{lit} 0\n")
+
+        var_num = max([self.__var_num] + [abs(lit) for lit in assumptions])
+        self.__write_header(var_num, len(self.__offsets) + len(assumptions))
+        self.__file.flush()
+
+        if self.__stats is not None:
+            self.__stats.time("serialize", time.perf_counter() - start)
+        try:
+            res = run_gophersat(self.__executable, self.__file_name, self.__stats)
+        finally:
+            # même en cas d'erreur, les hypothèses ne doivent pas rester
+            # dans la base résidente
+            if assumptions:
+                self.__file.truncate(end)
+
+        return res
+
+    def close(self):
+        self.__finalizer()
+
+
+# Stockage compact des clauses : tous les littéraux à la suite dans un
+# array("i"), chaque clause terminée par 0 comme en DIMACS, et la position
+# de début de chaque clause dans offsets.
+class ClauseArena:
+    def __init__(self):
+        self.__lits = array("i")
+        self.__offsets = array("q", [0])
+        self.__marks: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.__offsets) - 1
+
+    def __getitem__(self, k: int) -> List[int]:
+        if k < 0:
+            k += len(self)
+        if not 0 <= k < len(self):
+            raise IndexError("clause index out of range")
+        return self.__lits[self.__offsets[k] : self.__offsets[k + 1] - 1].tolist()
+
+    def __iter__(self) -> Iterator[List[int]]:
+        return self.clauses()
+
+    def clauses(self, start: int = 0, stop: Optional[int] = None) -> Iterator[List[int]]:
+        offsets = self.__offsets
+        stop = len(self) if stop is None else min(stop, len(self))
+        # conversion par blocs : une seule copie array -> list par bloc
+        for block in range(start, stop, DIMACS_CHUNK):
+            end = min(block + DIMACS_CHUNK, stop)
+            bounds = offsets[block : end + 1].tolist()
+            base = bounds[0]
+            lits = self.__lits[base : bounds[-1]].tolist()
+            for k in range(end - block):
+                yield lits[bounds[k] - base : bounds[k + 1] - base - 1]
+
+    def dimacs(self, start: int = 0, stop: Optional[int] = None) -> str:
+        stop = len(self) if stop is None else min(stop, len(self))
+        if start >= stop:
+            return ""
+
+        block = self.__lits[self.__offsets[start] : self.__offsets[stop]]
+        # seul le terminateur commence par 0 : " 0" marque chaque fin de clause
+        text = " " + " ".join(map(str, block))
+        return text.replace(" 0", " 0\n").replace("\n ", "\n")[1:]
+
+    def push(self, clause: List[int]):
+        self.__lits.extend(clause)
+        self.__lits.append(0)
+        self.__offsets.append(len(self.__lits))
+
+    def pop(self) -> List[int]:
+        if len(self) == 0:
+            raise IndexError("pop from empty clause arena")
+        end = self.__offsets.pop()
+        start = self.__offsets[-1]
+        clause = self.__lits[start : end - 1].tolist()
+        del self.__lits[start:]
+        return clause
+
+    def extend(self, other: "ClauseArena"):
+        base = len(self.__lits)
+        self.__lits.extend(other.__lits)
+        self.__offsets.extend(base + offset for offset in other.__offsets[1:])
+
+    def var_num(self) -> int:
+        if not self.__lits:
+            return 0
+        return max(max(self.__lits), -min(self.__lits))
+
+    def write_to(self, f: BinaryIO):
+        f.write(ARENA_MAGIC)
+        f.write(array("q", [len(self.__lits), len(self.__offsets)]).tobytes())
+        self.__lits.tofile(f)
+        self.__offsets.tofile(f)
+
+    @staticmethod
+    def read_from(f: BinaryIO) -> "ClauseArena":
+        if f.read(len(ARENA_MAGIC)) != ARENA_MAGIC:
+            raise ValueError("not a clause arena file")
+        sizes = array("q")
+        sizes.fromfile(f, 2)
+
+        arena = ClauseArena()
+        arena.__lits.fromfile(f, sizes[0])
+        arena.__offsets = array("q")
+        arena.__offsets.fromfile(f, sizes[1])
+
+        return arena
+
+    def mark(self, name: str = "") -> int:
+        self.__marks[name] = len(self)
+        return len(self)
+
+    def rollback_to(self, mark: Union[int, str] = "") -> int:
+        if isinstance(mark, str):
+            mark = self.__marks[mark]
+        mark = max(0, min(mark, len(self)))
+        removed = len(self) - mark
+
+        del self.__lits[self.__offsets[mark] :]
+        del self.__offsets[mark + 1 :]
+        for name, m in list(self.__marks.items()):
+            if m > mark:
+                del self.__marks[name]
+
+        return removed
+
+    def clear(self):
+        self.rollback_to(0)
+
+    def lits_num(self) -> int:
+        return len(self.__lits) - len(self)
+
+    def nbytes(self) -> int:
+        return (
+            self.__lits.itemsize * len(self.__lits)
+            + self.__offsets.itemsize * len(self.__offsets)
+        )
+
+
+# Propagation unitaire incrémentale (niveau 0) : maintient l'ensemble des
+# littéraux forcés par la base au fil des ajouts de clauses.
+class UnitPropagator:
+    def __init__(self):
+        self.__values: List[int] = [0]
+        self.__watches: Dict[int, List[List[int]]] = {}
+        self.__occurrences: Dict[int, List[List[int]]] = {}
+        self.__trail: List[int] = []
+        self.__qhead = 0
+        self.__conflict = False
+
+    def __grow(self, var: int):
+        if var >= len(self.__values):
+            self.__values.extend([0] * (var + 1 - len(self.__values)))
+
+    def value(self, lit: int) -> int:
+        v = abs(lit)
+        if v >= len(self.__values):
+            return 0
+        return self.__values[v] if lit > 0 else -self.__values[v]
+
+    def inconsistent(self) -> bool:
+        return self.__conflict
+
+    def forced(self) -> List[int]:
+        return list(self.__trail)
+
+    def occurrences(self, lit: int) -> List[List[int]]:
+        return self.__occurrences.get(lit, [])
+
+    def __assign(self, lit: int):
+        self.__values[abs(lit)] = 1 if lit > 0 else -1
+        self.__trail.append(lit)
+
+    def add_clause(self, clause: List[int]):
+        for lit in clause:
+            self.__occurrences.setdefault(lit, []).append(clause)
+
+        if self.__conflict:
+            return
+
+        self.__grow(max(map(abs, clause), default=0))
+        free = []
+        for lit in clause:
+            val = self.value(lit)
+            if val == 1:
+                return
+            if val == 0 and lit not in free:
+                free.append(lit)
+
+        if len(free) == 0:
+            self.__conflict = True
+        elif len(free) == 1:
+            self.__assign(free[0])
+            self.__conflict = not self.__propagate()
+        else:
+            w = free + [lit for lit in clause if lit not in free]
+            self.__watches.setdefault(-w[0], []).append(w)
+            self.__watches.setdefault(-w[1], []).append(w)
+
+    def __propagate(self) -> bool:
+        trail = self.__trail
+        watches = self.__watches
+        while self.__qhead < len(trail):
+            lit = trail[self.__qhead]
+            self.__qhead += 1
+            false_lit = -lit
+
+            ws = watches.get(lit, [])
+            kept = []
+            for k, clause in enumerate(ws):
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], false_lit
+
+                first = clause[0]
+                if self.value(first) == 1:
+                    kept.append(clause)
+                    continue
+
+                for m in range(2, len(clause)):
+                    if self.value(clause[m]) != -1:
+                        clause[1], clause[m] = clause[m], false_lit
+                        watches.setdefault(-clause[1], []).append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if self.value(first) == -1:
+                        kept.extend(ws[k + 1 :])
+                        watches[lit] = kept
+                        return False
+                    self.__assign(first)
+
+            watches[lit] = kept
+
+        return True
+
+    def refutes(self, lit: int) -> bool:
+        # test du littéral raté : lit conduit-il à un conflit par propagation ?
+        if self.__conflict or self.value(lit) == -1:
+            return True
+        if self.value(lit) == 1:
+            return False
+
+        self.__grow(abs(lit))
+        start = len(self.__trail)
+        self.__assign(lit)
+        conflict = not self.__propagate()
+
+        for l in self.__trail[start:]:
+            self.__values[abs(l)] = 0
+        del self.__trail[start:]
+        self.__qhead = start
+
+        return conflict
+
+
 class Gophersat:
     def __init__(
-        self, gophersat_exec: str = "gophersat", voc: List[str] = [], cnf_file: str = ""
+        self,
+        gophersat_exec: str = "gophersat",
+        voc: List[str] = [],
+        cnf_file: str = "",
+        session: bool = False,
+        backend: str = "exec",
+        cache_size: int = ENTAILMENT_CACHE_SIZE,
+        slicing: bool = True,
+        stats: Optional[SolverStats] = None,
     ):
+        if backend not in BACKENDS:
+            raise ValueError(f"unknown backend {backend!r}, expected one of {BACKENDS}")
+
         # self.find_exec()
         self.__executable = gophersat_exec
+        self.__backend = backend
+        self.__use_session = session or backend == "cdcl"
+        self.__session: Optional[Union[GophersatSession, CDCLSolver]] = None
+        self.__propagator: Optional[UnitPropagator] = None
+        self.__witness: Optional[set] = None
+        self.__version = 0
+        self.__cache_size = cache_size
+        self.__slicing = slicing
+        self.__entailment_cache: "OrderedDict[int, Tuple[int, bool]]" = OrderedDict()
+        self.__solve_num = 0
+        self.__stats = stats
 
         self.__voc = voc
         self.__has_changed = False
         self.__satisfiable = True
         self.__model: List[int] = []
-        self.__clauses: List[List[int]] = []
+        self.__clauses = ClauseArena()
         self.__clause_num = 0
         self.__var_num = 0
         self.__voc_dict: Dict[str, int] = {}
+        self.__frozen_num = 0
+        self.__frozen_serialized = 0
+        self.__frozen_dimacs = ""
 
         if cnf_file != "":
             self.read_cnf_file(cnf_file)
@@ -50,89 +541,479 @@ class Gophersat:
         self.__has_changed = True
         self.__satisfiable = None
         self.__model = []
+        self.__version += 1
+
+    def version(self) -> int:
+        return self.__version
+
+    def solve_num(self) -> int:
+        # nombre d'appels effectifs au solveur (base complète ou sous-base)
+        return self.__solve_num
+
+    def stats(self) -> Optional[SolverStats]:
+        return self.__stats
 
     def voc2dictionnary(self):
-        i = 0
-        d = {}
-        for v in self.__voc:
-            d[v] = i
-            i += 1
+        # le dictionnaire des noms n'est construit qu'au premier usage
+        # d'une clause « pretty »
+        self.__var_num = max(self.__var_num, len(self.__voc))
+        self.__voc_dict = {}
 
-        self.__var_num = len(self.__voc)
-        self.__voc_dict = d
+    def get_voc(self):
+        return self.__voc
 
-    def push_pretty_clause(self, clause: List[str]):
-        l = []
-        for lit in clause:
-            if lit[0] == "-" or lit[0] == "¬":
-                l.append(-(self.__voc_dict[lit[1:]] + 1))
-            else:
-                l.append((self.__voc_dict[lit] + 1))
+    def get_clauses(self) -> ClauseArena:
+        # à lire seulement : les modifications passent par push_clause
+        return self.__clauses
+
+    def pretty_literal(self, lit: str) -> int:
+        if not self.__voc_dict:
+            self.__voc_dict = {v: i for i, v in enumerate(self.__voc)}
+
+        if lit[0] == "-" or lit[0] == "¬":
+            return -(self.__voc_dict[lit[1:]] + 1)
+
+        return self.__voc_dict[lit] + 1
 
-        self.push_clause(l)
+    def push_pretty_clause(self, clause: List[str]):
+        self.push_clause([self.pretty_literal(lit) for lit in clause])
 
     def push_clause(self, clause: List[int]):
-        self.__clauses.append(clause)
+        self.__clauses.push(clause)
         self.__clause_num += 1
+        self.__var_num = max(self.__var_num, max(map(abs, clause), default=0))
+        self.__added(clause)
+        self.changed()
+
+    def push_clauses(self, clauses: ClauseArena):
+        start = len(self.__clauses)
+        self.__clauses.extend(clauses)
+        self.__clause_num += len(clauses)
+        self.__var_num = max(self.__var_num, clauses.var_num())
+        if (
+            self.__session is not None
+            or self.__propagator is not None
+            or self.__witness is not None
+        ):
+            for clause in self.__clauses.clauses(start):
+                self.__added(clause)
         self.changed()
 
+    def __added(self, clause: List[int]):
+        if self.__session is not None:
+            self.__session.add_clause(clause)
+        if self.__propagator is not None:
+            self.__propagator.add_clause(clause)
+        if self.__witness is not None and not any(l in self.__witness for l in clause):
+            if self.__propagator is None or not self.__repair_witness(clause):
+                self.__witness = None
+
     def pop_clause(self):
-        self.__clauses = self.__clauses[:-1]
+        if len(self.__clauses) > 0:
+            self.__clauses.pop()
+            self.__removed(1)
+
+    def mark(self, name: str = "") -> int:
+        return self.__clauses.mark(name)
+
+    def rollback_to(self, mark: Union[int, str] = ""):
+        removed = self.__clauses.rollback_to(mark)
+        if removed > 0:
+            self.__removed(removed)
+
+    def __removed(self, count: int):
+        self.__clause_num -= count
+        if self.__session is not None:
+            self.__session.pop_clause(count)
+        self.__propagator = None
+        self.__entailment_cache.clear()
+        if len(self.__clauses) < self.__frozen_num:
+            self.__frozen_num = 0
+            self.__frozen_serialized = 0
+            self.__frozen_dimacs = ""
         self.changed()
 
-    def solve(self):
-        if not (self.__has_changed):
-            return self.__satisfiable
+    def freeze(self):
+        # les clauses présentes ne changent plus : leur sérialisation est
+        # calculée une fois (à la première écriture DIMACS) puis réutilisée
+        self.__frozen_num = len(self.__clauses)
 
-        temporary_dir = tempfile.gettempdir()
-        temporary_file_name = f"{os.path.join(temporary_dir, uuid.uuid4().hex)}.cnf"
+    def propagator(self) -> UnitPropagator:
+        if self.__propagator is None:
+            self.__propagator = UnitPropagator()
+            for clause in self.__clauses:
+                self.__propagator.add_clause(clause)
 
-        with open(temporary_file_name, "w", newline="\n") as f:
-            f.write(self.dimacs())
+        return self.__propagator
 
-        res = subprocess.run(
-            [self.__executable, f.name], stdout=subprocess.PIPE, stderr=subprocess.PIPE
-        )
+    def get_forced_literals(self) -> List[int]:
+        return self.propagator().forced()
+
+    def __repair_witness(self, clause: List[int], frozen: List[int] = []) -> bool:
+        # réparation locale du dernier modèle (flips à la WalkSAT) pour qu'il
+        # satisfasse encore la base et clause ; annulée en cas d'échec
+        model = self.__witness
+        prop = self.__propagator
+        broken = [clause]
+        flipped: List[int] = []
+        while broken:
+            c = broken.pop()
+            if any(l in model for l in c):
+                continue
+            if len(flipped) == REPAIR_BUDGET:
+                break
+
+            best, best_broken = 0, []
+            for lit in c:
+                if prop.value(lit) == -1 or -lit in frozen:
+                    continue
+                b = [
+                    d
+                    for d in prop.occurrences(-lit)
+                    if not any(l in model for l in d if l != -lit)
+                ]
+                if best == 0 or len(b) < len(best_broken):
+                    best, best_broken = lit, b
+            if best == 0:
+                break
 
-        os.remove(temporary_file_name)
+            model.discard(-best)
+            model.add(best)
+            flipped.append(best)
+            broken.extend(best_broken)
+        else:
+            return True
+
+        for lit in reversed(flipped):
+            model.discard(lit)
+            model.add(-lit)
+
+        return False
+
+    def open_session(self) -> Union[GophersatSession, CDCLSolver]:
+        if self.__session is None:
+            if self.__backend == "cdcl":
+                self.__session = CDCLSolver()
+            else:
+                self.__session = GophersatSession(self.__executable, self.__stats)
+            self.__session.set_var_num(self.__var_num)
+            for clause in self.__clauses:
+                self.__session.add_clause(clause)
+
+        return self.__session
 
-        err = res.stderr.decode("utf8")
-        if err != "":
-            print("error:", err)
-            sys.exit(2)
+    def close(self):
+        if self.__session is not None:
+            self.__session.close()
+            self.__session = None
 
-        out = res.stdout.decode("utf8")
-        lines = out.splitlines()
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def solve(self, assumptions: List[int] = []) -> bool:
+        if not (self.__has_changed) and (not assumptions or not self.__satisfiable):
+            return self.__satisfiable
+
+        self.__solve_num += 1
+        stats = self.__stats
+        if stats is not None:
+            start = time.perf_counter()
+
+        if self.__use_session:
+            sat, model = self.open_session().solve(assumptions)
+            if stats is not None and self.__backend == "cdcl":
+                stats.time("solve", time.perf_counter() - start)
+        else:
+            temporary_file_name = temporary_cnf()
+            try:
+                with open(temporary_file_name, "w", newline="\n") as f:
+                    self.write_dimacs(f, assumptions)
+                if stats is not None:
+                    stats.time("serialize", time.perf_counter() - start)
 
-        sat = lines[1][2:]
+                sat, model = run_gophersat(self.__executable, temporary_file_name, stats)
+            finally:
+                os.remove(temporary_file_name)
 
-        if sat == "SATISFIABLE":
-            self.__model = list(map(int, lines[2][2:].split(" ")))[:-1]
+        if stats is not None:
+            stats.query(
+                "solve",
+                max([self.__var_num] + [abs(lit) for lit in assumptions]),
+                self.__clause_num + len(assumptions),
+                sat,
+                time.perf_counter() - start,
+            )
+
+        if not assumptions:
+            self.__satisfiable = sat
+            self.__has_changed = False
+        elif sat:
+            # un modèle sous hypothèses est aussi un modèle de la base
             self.__satisfiable = True
+            self.__has_changed = False
+
+        self.__model = model
+        if sat:
+            self.__witness = set(model)
+
+        return sat
+
+    def entails(self, literal: int) -> bool:
+        res = self.quick_entails(literal)
+        if res is None:
+            if self.__slicing:
+                res = self.__entails_slice(literal)
+            else:
+                res = not self.solve([-literal])
+            self.__remember(literal, res)
+
+        return res
+
+    def quick_entails(self, literal: int) -> Optional[bool]:
+        # réponse sans appeler le solveur (cache, propagation, dernier modèle
+        # connu, littéral raté, réparation du modèle), None sinon
+        cached = self.__entailment_cache.get(literal)
+        if cached is not None and (cached[1] or cached[0] == self.__version):
+            self.__entailment_cache.move_to_end(literal)
+            if self.__stats is not None:
+                self.__stats.count("cache_hit")
+            return cached[1]
+
+        res = self.__entails_fast(literal)
+        if res is not None:
+            self.__remember(literal, res)
+
+        return res
+
+    def record_entailment(
+        self,
+        literal: int,
+        entailed: bool,
+        model: List[int] = [],
+        variables: set = set(),
+        eliminated: List[int] = [],
+    ):
+        # résultat d'une implication calculée ailleurs (ex. par un
+        # solverpool.SolverPool) sur la sous-base slice([literal]) ; le
+        # modèle trouvé, s'il y en a un, complète le dernier modèle connu
+        self.__remember(literal, entailed)
+        if model and self.__witness is not None:
+            self.__complete_witness(model, variables, eliminated)
+
+    def set_model(self, model: List[int]):
+        # modèle de toute la base (version courante) trouvé ailleurs
+        self.__satisfiable = True
+        self.__has_changed = False
+        self.__model = model
+        self.__witness = set(model)
+
+    def __remember(self, literal: int, res: bool):
+        # cache LRU : un littéral impliqué le reste tant qu'on ne fait
+        # qu'ajouter des clauses, une non-implication ne vaut que pour la
+        # version de la base où elle a été établie
+        if self.__cache_size > 0:
+            cache = self.__entailment_cache
+            cache[literal] = (self.__version, res)
+            cache.move_to_end(literal)
+            if len(cache) > self.__cache_size:
+                cache.popitem(last=False)
+
+    def __entails_fast(self, literal: int) -> Optional[bool]:
+        # chemin rapide : propagation unitaire et dernier modèle connu, le
+        # solveur n'est appelé que si les deux ne concluent pas
+        stats = self.__stats
+        prop = self.propagator()
+        if prop.inconsistent() or prop.value(literal) == 1:
+            if stats is not None:
+                stats.count("entails_propagation")
+            return True
+        if self.__witness is not None and literal not in self.__witness:
+            if stats is not None:
+                stats.count("entails_witness")
+            return False
+        if prop.refutes(-literal):
+            if stats is not None:
+                stats.count("entails_refutes")
+            return True
+        if self.__witness is not None and self.__repair_witness([-literal], [-literal]):
+            if stats is not None:
+                stats.count("entails_repair")
+            return False
+
+        if stats is not None:
+            stats.count("entails_solver")
+        return None
+
+    def slice(self, literals: List[int]) -> Tuple[List[List[int]], set, List[int]]:
+        # sous-base utile aux littéraux : clauses simplifiées par les
+        # littéraux forcés, reliées aux variables demandées par des
+        # variables libres communes. Une variable dont toutes les résolvantes
+        # sont tautologiques (ex. la brise d'une case non visitée) s'élimine
+        # avec ses clauses sans changer la satisfiabilité : la composante
+        # s'arrête à elle.
+        prop = self.propagator()
+
+        def libre(clause):
+            if any(prop.value(l) == 1 for l in clause):
+                return None
+            return [l for l in clause if prop.value(l) == 0]
+
+        memo: Dict[int, bool] = {}
+        eliminated: List[int] = []
+
+        def eliminable(v):
+            if v not in memo:
+                pos = [c for c in map(libre, prop.occurrences(v)) if c is not None]
+                neg = [c for c in map(libre, prop.occurrences(-v)) if c is not None]
+                memo[v] = all(
+                    any(-l in q for l in p if l != v) for p in pos for q in neg
+                )
+                if memo[v]:
+                    eliminated.append(v)
+            return memo[v]
+
+        queried = set(abs(lit) for lit in literals if prop.value(lit) == 0)
+        variables = set(queried)
+        todo = list(variables)
+        seen = set()
+        clauses = []
+        while todo:
+            v = todo.pop()
+            for clause in prop.occurrences(v) + prop.occurrences(-v):
+                if id(clause) in seen:
+                    continue
+                seen.add(id(clause))
+                reduced = libre(clause)
+                if reduced is None or any(
+                    abs(l) not in queried and eliminable(abs(l)) for l in reduced
+                ):
+                    continue
+                clauses.append(reduced)
+                for l in reduced:
+                    if abs(l) not in variables:
+                        variables.add(abs(l))
+                        todo.append(abs(l))
+
+        return clauses, variables, eliminated
+
+    def __solve_clauses(
+        self, clauses: List[List[int]], assumptions: List[int]
+    ) -> Tuple[bool, List[int]]:
+        # les variables de la sous-base sont renumérotées de 1 à k : le
+        # solveur ne voit que la composante, pas toute la carte
+        clauses, assumptions, names = renumber(clauses, assumptions)
+
+        self.__solve_num += 1
+        stats = self.__stats
+        if stats is not None:
+            start = time.perf_counter()
+
+        if self.__backend == "cdcl":
+            solver = CDCLSolver()
+            solver.set_var_num(len(names) - 1)
+            for clause in clauses:
+                solver.add_clause(clause)
+            sat, model = solver.solve(assumptions)
+            if stats is not None:
+                stats.time("solve", time.perf_counter() - start)
         else:
-            self.__model = []
-            self.__satisfiable = False
+            temporary_file_name = temporary_cnf()
+            try:
+                write_dimacs(temporary_file_name, len(names) - 1, clauses, assumptions)
+                if stats is not None:
+                    stats.time("serialize", time.perf_counter() - start)
+
+                sat, model = run_gophersat(self.__executable, temporary_file_name, stats)
+            finally:
+                os.remove(temporary_file_name)
+
+        if stats is not None:
+            stats.query(
+                "slice_solve",
+                len(names) - 1,
+                len(clauses) + len(assumptions),
+                sat,
+                time.perf_counter() - start,
+            )
+
+        return sat, unnumber(model, names)
+
+    def __entails_slice(self, literal: int) -> bool:
+        # les composantes de la base simplifiée sont indépendantes : une fois
+        # la base reconnue satisfiable (une fois par version), seule la
+        # composante du littéral décide de l'implication
+        if self.__witness is None and not self.solve():
+            return True
+        if self.__witness is None:
+            return not self.solve([-literal])
+
+        clauses, variables, eliminated = self.slice([literal])
+        sat, model = self.__solve_clauses(clauses, [-literal])
+        if sat:
+            self.__complete_witness(model, variables, eliminated)
+
+        return not sat
+
+    def __complete_witness(
+        self, model: List[int], variables: set, eliminated: List[int]
+    ):
+        # le modèle de la composante complète le dernier modèle connu,
+        # puis les variables éliminées sont recalculées en sens inverse
+        witness = self.__witness
+        for lit in model:
+            if abs(lit) in variables:
+                witness.discard(-lit)
+                witness.add(lit)
+        prop = self.propagator()
+        for v in reversed(eliminated):
+            needed = any(
+                not any(l in witness for l in c if l != v)
+                for c in prop.occurrences(v)
+            )
+            witness.discard(-v if needed else v)
+            witness.add(v if needed else -v)
 
-        return self.__satisfiable
+    def backbone(self, literals: List[int]) -> List[int]:
+        # littéraux de la liste impliqués par la base ; chaque modèle trouvé
+        # en route élimine d'un coup tous les candidats qu'il contredit
+        if self.__witness is None and not self.solve():
+            return list(literals)
+
+        entailed = []
+        for lit in literals:
+            if self.__witness is not None and lit not in self.__witness:
+                continue
+            if self.entails(lit):
+                entailed.append(lit)
+
+        return entailed
+
+    def entails_pretty(self, literal: str) -> bool:
+        return self.entails(self.pretty_literal(literal))
 
     def get_model(self):
         return self.__model
 
-    def get_pretty_model(self):
-        s = ""
-        for i in self.__model:
-            if i < 0:
-                s += "¬"
-            s += f"{self.__voc[abs(i)-1]} ∧ "
-
-        s = s.rstrip("∧ ")
+    def pretty_lit(self, lit: int) -> str:
+        return f"¬{self.__voc[-lit-1]}" if lit < 0 else self.__voc[lit - 1]
 
-        return s
+    def get_pretty_model(self):
+        return " ∧ ".join(map(self.pretty_lit, self.__model))
 
     def read_cnf_file(self, filename: str):
+        self.close()
+        self.__propagator = None
+        self.__witness = None
+        self.__entailment_cache.clear()
+        self.__frozen_num = 0
+        self.__frozen_serialized = 0
+        self.__frozen_dimacs = ""
         self.__var_num = 0
         self.__clause_num = 0
-        self.__clauses = []
+        self.__clauses = ClauseArena()
         self.__has_changed = True
 
         with open(filename) as f:
@@ -145,7 +1026,7 @@ class Gophersat:
                 elif l[0] == "p":
                     continue
                 else:
-                    self.__clauses.append(self.read_clause(l))
+                    self.__clauses.push(self.read_clause(l))
                     self.__clause_num += 1
 
     def read_clause(self, s: str) -> List[int]:
@@ -156,42 +1037,41 @@ class Gophersat:
 
         return l
 
-    def dimacs(self) -> str:
-        s = "c automatically generated by gopherpysat\n"
-        s += f"p cnf {self.__var_num} {self.__clause_num}\n"
+    def write_dimacs(
+        self, f: TextIO, assumptions: List[int] = [], chunk_size: int = DIMACS_CHUNK
+    ):
+        var_num = max([self.__var_num] + [abs(lit) for lit in assumptions])
+        f.write(dimacs_header(var_num, self.__clause_num + len(assumptions)))
+        if self.__frozen_serialized < self.__frozen_num:
+            self.__frozen_dimacs += self.__clauses.dimacs(
+                self.__frozen_serialized, self.__frozen_num
+            )
+            self.__frozen_serialized = self.__frozen_num
+        f.write(self.__frozen_dimacs)
 
-        for clause in self.__clauses:
-            for lit in clause:
-                s += f"{lit} "
-            s += "0\n"
+        for k in range(self.__frozen_num, len(self.__clauses), chunk_size):
+            f.write(self.__clauses.dimacs(k, k + chunk_size))
 
-        return s
+        f.write("".join(f"{lit} 0\n" for lit in assumptions))
 
-    def pretty_clause(self, clause):
-        s = ""
-        for lit in clause:
-            if lit < 0:
-                s += "¬"
-            s += f"{self.__voc[abs(lit)-1]} ∨ "
+    def dimacs(self, assumptions: List[int] = []) -> str:
+        f = io.StringIO()
+        self.write_dimacs(f, assumptions)
 
-        s = s.rstrip("∨ ")
+        return f.getvalue()
 
-        return s
+    def pretty_clause(self, clause):
+        return " ∨ ".join(map(self.pretty_lit, clause))
 
     def __str__(self):
-        if self.__voc == []:
+        if len(self.__voc) == 0:
             return self.dimacs()
 
-        s = ""
-        for clause in self.__clauses:
-            s += self.pretty_clause(clause)
-            s += "\n"
-
-        return s
+        return "".join(self.pretty_clause(clause) + "\n" for clause in self.__clauses)
 
 
-def run(filename):
-    gs = Gophersat(cnf_file=filename)
+def run(filename, backend: str = "exec"):
+    gs = Gophersat(cnf_file=filename, backend=backend)
 
     if gs.solve():
         print("SAT", end=": ")
@@ -201,9 +1081,9 @@ def run(filename):
 
 
 if __name__ == "__main__":
-    if len(os.sys.argv) != 2:
+    if len(os.sys.argv) not in (2, 3) or os.sys.argv[2:] not in ([], ["exec"], ["cdcl"]):
         print(USAGE)
         sys.exit(1)
 
     cnf = os.sys.argv[1]
-    run(cnf)
+    run(cnf, *os.sys.argv[2:])
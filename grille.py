@@ -0,0 +1,28 @@
+from typing import List, Tuple
+
+__author__ = "Alicia BOULLEE, Simon DEVAUCHELLE,"
+__copyright__ = "Copyright 2020, UTC"
+__license__ = "LGPL-3.0"
+__version__ = "0.1.0"
+__maintainer__ = "Alicia BOULLEE? Simon DEVAUCHELLE"
+__email__ = "alicia.boullee@etu.utc.fr"
+__status__ = "dev"
+
+"""
+Voisinage des cases de la grille, partagé par les règles (wumpuscnf,
+tiling), le parcours (wumpusfinal), le risque et la planification.
+
+L'ordre des voisins (bas, haut, droite, gauche) est celui de successeur1 :
+il fixe l'ordre des clauses et celui des sondes, donc les parcours
+enregistrés dans tests/data/parcours.json.
+"""
+
+Position = Tuple[int, int]
+
+
+def voisins(i: int, j: int, n: int) -> List[Position]:
+    return [
+        (a, b)
+        for a, b in ((i + 1, j), (i - 1, j), (i, j + 1), (i, j - 1))
+        if 0 <= a < n and 0 <= b < n
+    ]
@@ -0,0 +1,196 @@
+import time
+
+from array import array
+from collections import deque
+from typing import Dict, Iterable, List, Sequence, Set
+
+from grille import Position, voisins
+
+__author__ = "Alicia BOULLEE, Simon DEVAUCHELLE,"
+__copyright__ = "Copyright 2020, UTC"
+__license__ = "LGPL-3.0"
+__version__ = "0.1.0"
+__maintainer__ = "Alicia BOULLEE? Simon DEVAUCHELLE"
+__email__ = "alicia.boullee@etu.utc.fr"
+__status__ = "dev"
+
+"""
+Champs de distances sur la grille pour planifier le ramassage de l'or.
+
+Tous les pas coûtent la même chose : un parcours en largeur depuis une
+case donne d'un coup sa distance à toutes les autres, et on en extrait un
+plus court chemin depuis n'importe quelle case en descendant le champ.
+"""
+
+# au-delà de HELD_KARP_MAX pépites, recherche locale bornée à TOUR_BUDGET s
+HELD_KARP_MAX = 12
+TOUR_BUDGET = 0.2
+
+
+def champ_distances(source: Sequence[int], murs: Set[Position], n: int) -> array:
+    # distance (en pas) de chaque case i * n + j à source, -1 si inaccessible
+    champ = array("l", [-1]) * (n * n)
+    si, sj = source[0], source[1]
+    if (si, sj) in murs:
+        return champ
+
+    champ[si * n + sj] = 0
+    file = deque([(si, sj)])
+    while file:
+        i, j = file.popleft()
+        d = champ[i * n + j] + 1
+        for a, b in voisins(i, j, n):
+            if champ[a * n + b] < 0 and (a, b) not in murs:
+                champ[a * n + b] = d
+                file.append((a, b))
+
+    return champ
+
+
+def chemin_champ(champ: array, depart: Sequence[int], n: int) -> List[List[int]]:
+    # plus court chemin de depart jusqu'à la source du champ, [] si aucun
+    i, j = depart[0], depart[1]
+    if champ[i * n + j] < 0:
+        return []
+
+    res = [[i, j]]
+    while champ[i * n + j] > 0:
+        d = champ[i * n + j] - 1
+        for a, b in voisins(i, j, n):
+            if champ[a * n + b] == d:
+                i, j = a, b
+                break
+        res.append([i, j])
+
+    return res
+
+
+def champs_distances(
+    points: Iterable[Sequence[int]], l_wall: Iterable[Sequence[int]], n: int
+) -> Dict[Position, array]:
+    murs = set(map(tuple, l_wall))
+    return {(p[0], p[1]): champ_distances(p, murs, n) for p in points}
+
+
+def matrice_distances(
+    points: Sequence[Sequence[int]], champs: Dict[Position, array], n: int
+) -> List[List[int]]:
+    # distances deux à deux entre points, lues dans les champs (-1 : aucun chemin)
+    return [
+        [champs[(q[0], q[1])][p[0] * n + p[1]] for q in points] for p in points
+    ]
+
+
+def longueur_tournee(d: List[List[int]], tournee: List[int]) -> int:
+    return sum(d[a][b] for a, b in zip(tournee, tournee[1:]))
+
+
+def held_karp(d: List[List[int]]) -> List[int]:
+    # tournée ouverte optimale partant du point 0 (programmation dynamique
+    # sur les sous-ensembles de points déjà visités)
+    k = len(d) - 1
+    if k == 0:
+        return [0]
+
+    full = 1 << k
+    inf = float("inf")
+    cout = [[inf] * k for _ in range(full)]
+    pred = [[-1] * k for _ in range(full)]
+    for j in range(k):
+        cout[1 << j][j] = d[0][j + 1]
+
+    for mask in range(1, full):
+        ligne = cout[mask]
+        for j in range(k):
+            c = ligne[j]
+            if c == inf:
+                continue
+            dj = d[j + 1]
+            for m in range(k):
+                if mask & (1 << m):
+                    continue
+                suivant = mask | (1 << m)
+                if c + dj[m + 1] < cout[suivant][m]:
+                    cout[suivant][m] = c + dj[m + 1]
+                    pred[suivant][m] = j
+
+    mask = full - 1
+    j = min(range(k), key=lambda j: cout[mask][j])
+    ordre = []
+    while j >= 0:
+        ordre.append(j + 1)
+        mask, j = mask & ~(1 << j), pred[mask][j]
+
+    return [0] + ordre[::-1]
+
+
+def plus_proche_voisin(d: List[List[int]]) -> List[int]:
+    tournee = [0]
+    restants = list(range(1, len(d)))
+    while restants:
+        suivant = min(restants, key=lambda p: d[tournee[-1]][p])
+        restants.remove(suivant)
+        tournee.append(suivant)
+    return tournee
+
+
+def deux_opt(d: List[List[int]], tournee: List[int], fin: float) -> bool:
+    # inversion d'un segment ; le départ reste fixe, l'arrivée est libre
+    m = len(tournee) - 1
+    for i in range(1, m):
+        for j in range(i + 1, m + 1):
+            a, b, c = tournee[i - 1], tournee[i], tournee[j]
+            gain = d[a][b] - d[a][c]
+            if j < m:
+                e = tournee[j + 1]
+                gain += d[c][e] - d[b][e]
+            if gain > 0:
+                tournee[i : j + 1] = tournee[i : j + 1][::-1]
+                return True
+        if time.perf_counter() > fin:
+            break
+    return False
+
+
+def or_opt(d: List[List[int]], tournee: List[int], fin: float) -> bool:
+    # déplacement d'un segment de 1 à 3 points, éventuellement retourné
+    for taille in (1, 2, 3):
+        for i in range(1, len(tournee) - taille + 1):
+            segment = tournee[i : i + taille]
+            reste = tournee[:i] + tournee[i + taille :]
+            avant = tournee[i - 1]
+            gain = d[avant][segment[0]]
+            if i + taille < len(tournee):
+                apres = tournee[i + taille]
+                gain += d[segment[-1]][apres] - d[avant][apres]
+
+            for p in range(len(reste)):
+                if p == i - 1:
+                    continue
+                a = reste[p]
+                b = reste[p + 1] if p + 1 < len(reste) else None
+                for seg in (segment, segment[::-1]):
+                    cout = d[a][seg[0]]
+                    if b is not None:
+                        cout += d[seg[-1]][b] - d[a][b]
+                    if cout < gain:
+                        tournee[:] = reste[: p + 1] + seg + reste[p + 1 :]
+                        return True
+            if time.perf_counter() > fin:
+                return False
+    return False
+
+
+def planifier_tournee(d: List[List[int]], budget: float = TOUR_BUDGET) -> List[int]:
+    # ordre de visite des points 1..k depuis le point 0 ; exact pour peu de
+    # points, sinon plus proche voisin amélioré par 2-opt et Or-opt
+    if len(d) - 1 <= HELD_KARP_MAX:
+        return held_karp(d)
+
+    fin = time.perf_counter() + budget
+    tournee = plus_proche_voisin(d)
+    while time.perf_counter() < fin:
+        if not (deux_opt(d, tournee, fin) or or_opt(d, tournee, fin)):
+            break
+
+    return tournee
@@ -0,0 +1,196 @@
+from typing import Dict, Iterable, List, Set, Tuple
+
+from gopherpysat import Gophersat
+from grille import Position, voisins
+from wumpuscnf import KIND_INDEX
+
+__author__ = "Alicia BOULLEE, Simon DEVAUCHELLE,"
+__copyright__ = "Copyright 2020, UTC"
+__license__ = "LGPL-3.0"
+__version__ = "0.1.0"
+__maintainer__ = "Alicia BOULLEE? Simon DEVAUCHELLE"
+__email__ = "alicia.boullee@etu.utc.fr"
+__status__ = "dev"
+
+"""
+Estimation du risque d'une case quand la logique ne permet plus d'avancer.
+
+Puits : chaque case inconnue en contient un avec la probabilité a priori
+pit_rate ; les brises connues imposent au moins un puits parmi les voisins
+inconnus. On compte les modèles pondérés composante par composante de la
+frontière (les composantes sont indépendantes), ce qui reste rapide même
+sur de grandes cartes.
+
+Wumpus : il est unique, donc uniforme sur les cases encore compatibles
+avec toutes les odeurs perçues.
+"""
+
+# au-delà, une composante n'est plus énumérée mais estimée
+MAX_ENUMERATION = 16
+# marginales déjà calculées : loin de la dernière sonde, les composantes de
+# la frontière ne changent pas d'un blocage à l'autre
+MARGINALES_CACHE_SIZE = 4096
+_marginales: Dict[Tuple, Dict[Position, float]] = {}
+
+
+def contraintes(
+    forced: Set[int], var, kind: str, percept: str, n: int, cellules: Iterable[Position]
+) -> List[List[Position]]:
+    # pour chaque percept vrai parmi cellules, la liste des voisins encore
+    # indécis (une contrainte déjà satisfaite par un voisin connu est ignorée)
+    res = []
+    for i, j in cellules:
+        if var(percept, i, j) not in forced:
+            continue
+        indecis = []
+        for a, b in voisins(i, j, n):
+            v = var(kind, a, b)
+            if v in forced:
+                break
+            if -v not in forced:
+                indecis.append((a, b))
+        else:
+            if indecis:
+                res.append(indecis)
+    return res
+
+
+def composantes(contr: List[List[Position]]) -> List[Tuple[List[Position], List[List[Position]]]]:
+    parent: Dict[Position, Position] = {}
+
+    def trouver(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for c in contr:
+        for x in c:
+            parent.setdefault(x, x)
+        for x in c[1:]:
+            parent[trouver(x)] = trouver(c[0])
+
+    groupes: Dict[Position, Tuple[List[Position], List[List[Position]]]] = {}
+    for x in parent:
+        groupes.setdefault(trouver(x), ([], []))[0].append(x)
+    for c in contr:
+        groupes[trouver(c[0])][1].append(c)
+
+    return list(groupes.values())
+
+
+def marginales(
+    cases: List[Position], contr: List[List[Position]], prior: float
+) -> Dict[Position, float]:
+    if len(cases) > MAX_ENUMERATION:
+        # estimation : une contrainte sur k cases en désigne une sur k
+        res = {c: prior for c in cases}
+        for c in contr:
+            for x in c:
+                res[x] = max(res[x], 1 / len(c))
+        return res
+
+    key = (tuple(cases), tuple(map(tuple, contr)), prior)
+    if key not in _marginales:
+        if len(_marginales) >= MARGINALES_CACHE_SIZE:
+            _marginales.clear()
+        _marginales[key] = enumerer(cases, contr, prior)
+    return dict(_marginales[key])
+
+
+def enumerer(
+    cases: List[Position], contr: List[List[Position]], prior: float
+) -> Dict[Position, float]:
+    index = {c: k for k, c in enumerate(cases)}
+    contr_idx = [[index[x] for x in c] for c in contr]
+    # contraintes vérifiables dès que leur dernière case est affectée
+    fin = [[] for _ in cases]
+    for c in contr_idx:
+        fin[max(c)].append(c)
+
+    valeurs = [False] * len(cases)
+    total = 0.0
+    poids_vrai = [0.0] * len(cases)
+
+    def explorer(k: int, poids: float):
+        nonlocal total
+        if k == len(cases):
+            total += poids
+            for m in range(len(cases)):
+                if valeurs[m]:
+                    poids_vrai[m] += poids
+            return
+        for val, p in ((True, prior), (False, 1 - prior)):
+            valeurs[k] = val
+            if all(any(valeurs[m] for m in c) for c in fin[k]):
+                explorer(k + 1, poids * p)
+        valeurs[k] = False
+
+    explorer(0, 1.0)
+    if total == 0:
+        return {c: prior for c in cases}
+    return {c: poids_vrai[index[c]] / total for c in cases}
+
+
+def probabilites_danger(
+    gs: Gophersat,
+    cases: Iterable[Position],
+    n: int,
+    wfound: bool = False,
+    pit_rate: float = 0.25,
+) -> Dict[Position, float]:
+    var = gs.get_voc().var
+    forced = set(gs.get_forced_literals())
+    cases = list(dict.fromkeys((c[0], c[1]) for c in cases))
+    # seules les cases voisines de la frontière portent des contraintes
+    # sur elle : on ne parcourt pas toute la carte
+    bord = list(dict.fromkeys(v for i, j in cases for v in voisins(i, j, n)))
+
+    # puits : comptage de modèles sur chaque composante de la frontière
+    p_puits: Dict[Position, float] = {}
+    for vars_comp, contr in composantes(contraintes(forced, var, "P", "B", n, bord)):
+        p_puits.update(marginales(vars_comp, contr, pit_rate))
+
+    # Wumpus : uniforme sur les cases compatibles avec toutes les odeurs
+    p_wumpus: Dict[Position, float] = {}
+    if not wfound:
+        odeurs = contraintes(forced, var, "W", "S", n, bord)
+        if odeurs:
+            candidats = set(odeurs[0])
+            for c in odeurs[1:]:
+                candidats &= set(c)
+            for c in candidats:
+                p_wumpus[c] = 1 / len(candidats)
+        else:
+            # aucune odeur : toutes les cases non exclues, comptées d'après
+            # les littéraux ¬W forcés
+            exclues = sum(
+                1 for lit in forced if lit < 0 and (-lit - 1) % 5 == KIND_INDEX["W"]
+            )
+            for i, j in cases:
+                p_wumpus[(i, j)] = 1 / max(1, n * n - exclues)
+
+    res = {}
+    for i, j in cases:
+        if var("P", i, j) in forced or var("W", i, j) in forced:
+            res[(i, j)] = 1.0
+            continue
+        pp = 0.0 if -var("P", i, j) in forced else p_puits.get((i, j), pit_rate)
+        pw = 0.0 if -var("W", i, j) in forced else p_wumpus.get((i, j), 0.0)
+        # puits et Wumpus s'excluent sur une même case
+        res[(i, j)] = min(1.0, pp + pw)
+
+    return res
+
+
+def case_moins_risquee(
+    gs: Gophersat,
+    cases: Iterable[Position],
+    n: int,
+    wfound: bool = False,
+    pit_rate: float = 0.25,
+) -> Tuple[Position, float]:
+    danger = probabilites_danger(gs, cases, n, wfound, pit_rate)
+    # à risque égal, la première case de la frontière
+    case = min(danger, key=danger.get)
+    return case, danger[case]
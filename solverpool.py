@@ -0,0 +1,201 @@
+import asyncio
+import os
+import weakref
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, Optional, Tuple
+
+from cdcl import CDCLSolver
+from gopherpysat import (
+    BACKENDS,
+    Gophersat,
+    parse_gophersat,
+    renumber,
+    temporary_cnf,
+    unnumber,
+    write_dimacs,
+)
+
+__author__ = "Alicia BOULLEE, Simon DEVAUCHELLE,"
+__copyright__ = "Copyright 2020, UTC"
+__license__ = "LGPL-3.0"
+__version__ = "0.1.0"
+__maintainer__ = "Alicia BOULLEE? Simon DEVAUCHELLE"
+__email__ = "alicia.boullee@etu.utc.fr"
+__status__ = "dev"
+
+"""
+Pool de solveurs asyncio : plusieurs requêtes SAT indépendantes (cases d'une
+même frontière, ou bases de mondes différents) sont lancées ensemble et
+attendues ensemble.
+
+- backend "exec" : un processus gophersat par requête, lancé avec
+  asyncio.create_subprocess_exec et tué si la requête dépasse son délai ;
+- backend "cdcl" : le solveur CDCL tourne dans des processus de travail
+  (ProcessPoolExecutor) ; une requête hors délai est abandonnée mais son
+  calcul se termine dans le processus qui l'exécutait.
+
+Le nombre de requêtes simultanées est borné par max_concurrency. Pour
+l'implication, les raccourcis de Gophersat.quick_entails sont essayés
+d'abord ; sinon seule la sous-base utile au littéral (Gophersat.slice) est
+envoyée, après une vérification de satisfiabilité de toute la base faite
+une fois par version, dont le modèle sert ensuite de témoin à la base.
+"""
+
+
+def _solve_cdcl(var_num: int, clauses: List[List[int]], assumptions: List[int]):
+    solver = CDCLSolver()
+    solver.set_var_num(var_num)
+    for clause in clauses:
+        solver.add_clause(clause)
+    return solver.solve(assumptions)
+
+
+class SolverPool:
+    def __init__(
+        self,
+        gophersat_exec: str = "gophersat",
+        backend: str = "exec",
+        max_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ):
+        if backend not in BACKENDS:
+            raise ValueError(f"unknown backend {backend!r}, expected one of {BACKENDS}")
+
+        self.__executable = gophersat_exec
+        self.__backend = backend
+        self.__max_concurrency = max_concurrency or os.cpu_count() or 1
+        self.__timeout = timeout
+        self.__executor: Optional[ProcessPoolExecutor] = None
+        # le sémaphore et les tâches appartiennent à une boucle asyncio : ils
+        # sont créés pour chaque boucle qui utilise le pool
+        self.__loops: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Tuple]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def __loop_state(self) -> Tuple[asyncio.Semaphore, weakref.WeakKeyDictionary]:
+        # sémaphore, et satisfiabilité de chaque base par version (tâche
+        # partagée), pour la boucle en cours
+        loop = asyncio.get_running_loop()
+        if loop not in self.__loops:
+            self.__loops[loop] = (
+                asyncio.Semaphore(self.__max_concurrency),
+                weakref.WeakKeyDictionary(),
+            )
+        return self.__loops[loop]
+
+    def close(self):
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=False, cancel_futures=True)
+            self.__executor = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        self.close()
+
+    async def solve(
+        self,
+        clauses: Iterable[List[int]],
+        assumptions: List[int] = [],
+        timeout: Optional[float] = None,
+    ) -> Tuple[bool, List[int]]:
+        # lève asyncio.TimeoutError si la requête dépasse son délai
+        clauses, renamed, names = renumber(list(clauses), list(assumptions))
+        timeout = timeout if timeout is not None else self.__timeout
+
+        async with self.__loop_state()[0]:
+            if self.__backend == "cdcl":
+                run = self.__run_cdcl(len(names) - 1, clauses, renamed)
+            else:
+                run = self.__run_exec(len(names) - 1, clauses, renamed)
+            sat, model = await asyncio.wait_for(run, timeout)
+
+        return sat, unnumber(model, names)
+
+    async def __run_cdcl(self, var_num, clauses, assumptions):
+        if self.__executor is None:
+            self.__executor = ProcessPoolExecutor(self.__max_concurrency)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.__executor, _solve_cdcl, var_num, clauses, assumptions
+        )
+
+    async def __run_exec(self, var_num, clauses, assumptions):
+        file_name = temporary_cnf()
+        write_dimacs(file_name, var_num, clauses, assumptions)
+
+        proc = None
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                self.__executable,
+                file_name,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            out, err = await proc.communicate()
+        except asyncio.CancelledError:
+            # délai dépassé : le processus gophersat est arrêté
+            if proc is not None and proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+            raise
+        finally:
+            os.remove(file_name)
+
+        if err:
+            raise RuntimeError(f"gophersat error: {err.decode('utf8')}")
+
+        return parse_gophersat(out.decode("utf8"))
+
+    async def satisfiable(self, gs: Gophersat, timeout: Optional[float] = None) -> bool:
+        satisfiable = self.__loop_state()[1]
+        cached = satisfiable.get(gs)
+        if cached is None or cached[0] != gs.version() or (
+            cached[1].done() and cached[1].exception() is not None
+        ):
+            task = asyncio.ensure_future(self.__solve_base(gs, timeout))
+            cached = (gs.version(), task)
+            satisfiable[gs] = cached
+
+        return await asyncio.shield(cached[1])
+
+    async def __solve_base(self, gs: Gophersat, timeout: Optional[float]) -> bool:
+        version = gs.version()
+        sat, model = await self.solve(gs.get_clauses(), [], timeout)
+        if sat and gs.version() == version:
+            # le modèle sert ensuite de témoin aux raccourcis de gs
+            gs.set_model(model)
+        return sat
+
+    async def entails(
+        self, gs: Gophersat, literal: int, timeout: Optional[float] = None
+    ) -> bool:
+        # mêmes raccourcis que Gophersat.entails (cache, propagation, dernier
+        # modèle, littéral raté) : seuls les littéraux qu'ils ne décident pas
+        # sont envoyés au pool
+        res = gs.quick_entails(literal)
+        if res is not None:
+            return res
+        version = gs.version()
+        if not await self.satisfiable(gs, timeout):
+            return True
+        if gs.version() == version:
+            # le modèle de la base peut maintenant décider le littéral
+            res = gs.quick_entails(literal)
+            if res is not None:
+                return res
+
+        clauses, variables, eliminated = gs.slice([literal])
+        sat, model = await self.solve(clauses, [-literal], timeout)
+        if gs.version() == version:
+            gs.record_entailment(literal, not sat, model, variables, eliminated)
+        return not sat
+
+    async def backbone(
+        self, gs: Gophersat, literals: List[int], timeout: Optional[float] = None
+    ) -> List[int]:
+        # toutes les implications sont demandées en même temps
+        res = await asyncio.gather(*(self.entails(gs, lit, timeout) for lit in literals))
+        return [lit for lit, entailed in zip(literals, res) if entailed]
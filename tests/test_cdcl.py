@@ -0,0 +1,80 @@
+import itertools
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from cdcl import CDCLSolver
+
+"""
+Comparaison du solveur CDCL avec l'énumération exhaustive des affectations
+sur des 3-CNF aléatoires de 6 à 10 variables, avec et sans hypothèses.
+Chaque modèle rendu doit satisfaire la formule et les hypothèses.
+"""
+
+SEEDS = range(200)
+REQUETES = 5
+
+
+def formule(rand):
+    # autour du seuil (4,26 clauses par variable) : mélange de formules
+    # satisfiables et insatisfiables
+    var_num = rand.randint(6, 10)
+    clauses = []
+    for _ in range(rand.randint(2 * var_num, 6 * var_num)):
+        variables = rand.sample(range(1, var_num + 1), 3)
+        clauses.append([v if rand.random() < 0.5 else -v for v in variables])
+    return var_num, clauses
+
+
+def modeles(var_num, clauses):
+    # toutes les affectations qui satisfont les clauses, en ensembles de
+    # littéraux
+    res = []
+    for valeurs in itertools.product((False, True), repeat=var_num):
+        vrais = {v if val else -v for v, val in zip(range(1, var_num + 1), valeurs)}
+        if all(any(lit in vrais for lit in clause) for clause in clauses):
+            res.append(vrais)
+    return res
+
+
+class TestCDCL(unittest.TestCase):
+    def verifier(self, solver, clauses, tous, assumptions):
+        attendu = any(all(lit in m for lit in assumptions) for m in tous)
+        sat, model = solver.solve(assumptions)
+        self.assertEqual(sat, attendu)
+        if sat:
+            vrais = set(model)
+            self.assertTrue(all(any(lit in vrais for lit in c) for c in clauses))
+            self.assertTrue(all(lit in vrais for lit in assumptions))
+
+    def test_force_brute(self):
+        for seed in SEEDS:
+            rand = random.Random(seed)
+            var_num, clauses = formule(rand)
+            with self.subTest(seed=seed):
+                # un seul solveur pour toutes les requêtes : les clauses
+                # apprises sont conservées d'une requête à l'autre
+                solver = CDCLSolver()
+                solver.set_var_num(var_num)
+                for clause in clauses:
+                    solver.add_clause(clause)
+
+                tous = modeles(var_num, clauses)
+                self.verifier(solver, clauses, tous, [])
+                for _ in range(REQUETES):
+                    variables = rand.sample(range(1, var_num + 1), rand.randint(1, 3))
+                    assumptions = [v if rand.random() < 0.5 else -v for v in variables]
+                    self.verifier(solver, clauses, tous, assumptions)
+
+                # retrait des dernières clauses puis nouvelle requête
+                count = rand.randint(1, len(clauses) // 2)
+                solver.pop_clause(count)
+                restantes = clauses[:-count]
+                self.verifier(solver, restantes, modeles(var_num, restantes), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,190 @@
+import itertools
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from cdcl import CDCLSolver
+from gopherpysat import Gophersat, renumber, unnumber
+
+"""
+Comparaison de Gophersat.entails et Gophersat.backbone avec l'énumération
+exhaustive des modèles, sur des bases aléatoires de 6 à 9 variables. Les
+raccourcis de quick_entails (cache, propagation unitaire, dernier modèle,
+littéral raté, réparation du modèle) doivent donner la même réponse que
+la force brute, y compris après pop_clause et rollback_to.
+
+Sur des bases plus grandes, formées de groupes de variables peu reliés et
+de variables définies (éliminées par slice), les réponses avec slicing
+doivent être celles de la base entière (slicing=False), qu'elles soient
+calculées par entails ou enregistrées par record_entailment.
+"""
+
+SEEDS = range(60)
+SLICE_SEEDS = range(40)
+
+
+def base_aleatoire(rand):
+    # clauses unitaires, binaires et ternaires : de quoi forcer des
+    # littéraux par propagation comme par littéral raté
+    var_num = rand.randint(6, 9)
+    clauses = []
+    for _ in range(rand.randint(var_num, 3 * var_num)):
+        taille = rand.choice([1, 2, 2, 3, 3, 3])
+        variables = rand.sample(range(1, var_num + 1), taille)
+        clauses.append([v if rand.random() < 0.5 else -v for v in variables])
+    return var_num, clauses
+
+
+def impliques(var_num, clauses):
+    # littéraux vrais dans tous les modèles (tous si la base est
+    # insatisfiable)
+    litteraux = [l for v in range(1, var_num + 1) for l in (v, -v)]
+    res = set(litteraux)
+    for valeurs in itertools.product((False, True), repeat=var_num):
+        vrais = {v if val else -v for v, val in zip(range(1, var_num + 1), valeurs)}
+        if all(any(lit in vrais for lit in clause) for clause in clauses):
+            res &= vrais
+    return [l for l in litteraux if l in res]
+
+
+def base_groupes(rand):
+    # groupes de variables reliés par quelques clauses, plus des variables
+    # définies par une disjonction (b <-> x ou y, comme une brise) et
+    # quelques faits
+    groupes = []
+    var_num = 0
+    for _ in range(rand.randint(2, 4)):
+        taille = rand.randint(4, 7)
+        groupes.append(list(range(var_num + 1, var_num + taille + 1)))
+        var_num += taille
+
+    clauses = []
+    for groupe in groupes:
+        for _ in range(rand.randint(len(groupe), 2 * len(groupe))):
+            variables = rand.sample(groupe, rand.choice([2, 3, 3]))
+            clauses.append([v if rand.random() < 0.5 else -v for v in variables])
+    for _ in range(rand.randint(0, 2)):
+        a, b = rand.sample(range(1, var_num + 1), 2)
+        clauses.append([a if rand.random() < 0.5 else -a, b if rand.random() < 0.5 else -b])
+    for _ in range(rand.randint(2, 5)):
+        x, y = rand.sample(range(1, var_num + 1), 2)
+        var_num += 1
+        clauses += [[-var_num, x, y], [var_num, -x], [var_num, -y]]
+    for v in rand.sample(range(1, var_num + 1), 2):
+        clauses.append([v if rand.random() < 0.5 else -v])
+
+    rand.shuffle(clauses)
+    return var_num, clauses
+
+
+def entails_enregistre(gs, literal):
+    # même chemin que SolverPool.entails, sans le pool : la sous-base est
+    # résolue à part et le résultat rendu à gs par record_entailment
+    res = gs.quick_entails(literal)
+    if res is not None:
+        return res
+    if not gs.solve():
+        return True
+    res = gs.quick_entails(literal)
+    if res is not None:
+        return res
+
+    clauses, variables, eliminated = gs.slice([literal])
+    clauses, assumptions, names = renumber(clauses, [-literal])
+    solver = CDCLSolver()
+    solver.set_var_num(len(names) - 1)
+    for clause in clauses:
+        solver.add_clause(clause)
+    sat, model = solver.solve(assumptions)
+    gs.record_entailment(literal, not sat, unnumber(model, names), variables, eliminated)
+    return not sat
+
+
+class TestEntails(unittest.TestCase):
+    def verifier(self, gs, var_num, clauses, rand):
+        attendu = impliques(var_num, clauses)
+        litteraux = [l for v in range(1, var_num + 1) for l in (v, -v)]
+        rand.shuffle(litteraux)
+        # d'abord quelques implications isolées, puis le backbone (qui
+        # profite des modèles et du cache laissés par les premières)
+        for lit in litteraux[:4]:
+            self.assertEqual(gs.entails(lit), lit in attendu, lit)
+        self.assertEqual(sorted(gs.backbone(litteraux)), sorted(attendu))
+        for lit in litteraux:
+            self.assertEqual(gs.entails(lit), lit in attendu, lit)
+        if len(attendu) < len(litteraux):
+            # base satisfiable : la propagation ne force que des littéraux
+            # impliqués
+            self.assertLessEqual(set(gs.get_forced_literals()), set(attendu))
+
+    def test_force_brute(self):
+        for seed in SEEDS:
+            rand = random.Random(seed)
+            var_num, clauses = base_aleatoire(rand)
+            moitie = len(clauses) // 2
+            with self.subTest(seed=seed):
+                gs = Gophersat(backend="cdcl")
+                for clause in clauses[:moitie]:
+                    gs.push_clause(clause)
+                gs.mark("moitie")
+                self.verifier(gs, var_num, clauses[:moitie], rand)
+
+                # ajouts un par un : le cache et le dernier modèle suivent
+                for k in range(moitie, len(clauses)):
+                    gs.push_clause(clauses[k])
+                    if k % 3 == 0:
+                        self.verifier(gs, var_num, clauses[: k + 1], rand)
+                self.verifier(gs, var_num, clauses, rand)
+
+                # retraits : les non-implications en cache ne valent plus
+                restantes = len(clauses)
+                for _ in range(rand.randint(1, 3)):
+                    if restantes > moitie:
+                        gs.pop_clause()
+                        restantes -= 1
+                self.verifier(gs, var_num, clauses[:restantes], rand)
+
+                gs.rollback_to("moitie")
+                self.verifier(gs, var_num, clauses[:moitie], rand)
+
+                # nouvel ajout après le retour au point de reprise
+                gs.push_clause(clauses[-1])
+                self.verifier(gs, var_num, clauses[:moitie] + clauses[-1:], rand)
+                gs.close()
+
+
+class TestSlicing(unittest.TestCase):
+    def test_slicing_identique(self):
+        for seed in SLICE_SEEDS:
+            rand = random.Random(seed)
+            var_num, clauses = base_groupes(rand)
+            with self.subTest(seed=seed):
+                entiere = Gophersat(backend="cdcl", slicing=False)
+                tranchee = Gophersat(backend="cdcl", slicing=True)
+                enregistree = Gophersat(backend="cdcl", slicing=True)
+                bases = (entiere, tranchee, enregistree)
+
+                # ajouts par lots, questions entre les lots : les modèles
+                # complétés par les sous-bases servent aux questions suivantes
+                lots = [clauses[k : k + 8] for k in range(0, len(clauses), 8)]
+                for lot in lots:
+                    for gs in bases:
+                        for clause in lot:
+                            gs.push_clause(clause)
+
+                    litteraux = [l for v in range(1, var_num + 1) for l in (v, -v)]
+                    rand.shuffle(litteraux)
+                    for lit in litteraux:
+                        attendu = entiere.entails(lit)
+                        self.assertEqual(tranchee.entails(lit), attendu, lit)
+                        self.assertEqual(entails_enregistre(enregistree, lit), attendu, lit)
+
+                for gs in bases:
+                    gs.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
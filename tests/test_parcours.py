@@ -0,0 +1,80 @@
+import contextlib
+import io
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import wumpusfinal as wf
+
+"""
+Test de non-régression du parcours : pour des mondes à graine fixe, la suite
+exacte des sondes (probe / cautious_probe) et le coût final de parcours_map
+et de parcours_frontiere doivent rester ceux enregistrés dans
+data/parcours.json.
+
+Après un changement voulu du parcours, les références se regénèrent avec
+python tests/test_parcours.py regenerer
+"""
+
+REFERENCE = os.path.join(os.path.dirname(__file__), "data", "parcours.json")
+
+SIZES = [4, 7, 10]
+SEEDS = range(10)
+PARCOURS = ["map", "frontiere"]
+
+
+def sondes(n, seed, parcours="map"):
+    # parcours complet en notant chaque sonde dans l'ordre
+    ww = wf.WumpusWorld(n, True, seed=seed)
+    appels = []
+    for nom in ("probe", "cautious_probe"):
+        sonde = getattr(ww, nom)
+
+        def noter(i, j, nom=nom, sonde=sonde):
+            appels.append([nom, i, j])
+            return sonde(i, j)
+
+        setattr(ww, nom, noter)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        with wf.clause_initialisation(ww) as gs:
+            if parcours == "map":
+                wf.parcours_map(wf.successeur1, wf.remove1, wf.insert1, ww, gs)
+            else:
+                wf.parcours_frontiere(ww, gs)
+
+    return {
+        "parcours": parcours,
+        "n": n,
+        "seed": seed,
+        "cost": ww.get_cost(),
+        "probes": appels,
+    }
+
+
+def regenerer():
+    res = [sondes(n, seed, p) for p in PARCOURS for n in SIZES for seed in SEEDS]
+    with open(REFERENCE, "w") as f:
+        json.dump(res, f)
+
+
+class TestParcours(unittest.TestCase):
+    def test_sondes_identiques(self):
+        with open(REFERENCE) as f:
+            reference = json.load(f)
+
+        for ref in reference:
+            with self.subTest(parcours=ref["parcours"], n=ref["n"], seed=ref["seed"]):
+                res = sondes(ref["n"], ref["seed"], ref["parcours"])
+                self.assertEqual(res["probes"], ref["probes"])
+                self.assertEqual(res["cost"], ref["cost"])
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["regenerer"]:
+        regenerer()
+    else:
+        unittest.main()
@@ -0,0 +1,86 @@
+import asyncio
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from gopherpysat import Gophersat
+from solverpool import SolverPool
+
+"""
+Un même SolverPool doit pouvoir servir depuis plusieurs boucles asyncio
+successives (plusieurs asyncio.run, ou plusieurs parcours par tuiles).
+"""
+
+CLAUSES = [[1, 2], [-1, 3], [-2, 3], [-3, 4, 5], [-4, -5]]
+LITERALS = [3, -3, 4, -4, 1, 2]
+
+
+def base():
+    gs = Gophersat(backend="cdcl")
+    for clause in CLAUSES:
+        gs.push_clause(clause)
+    return gs
+
+
+class TestSolverPool(unittest.TestCase):
+    def test_deux_boucles(self):
+        pool = SolverPool(backend="cdcl", max_concurrency=1)
+        gs = base()
+        try:
+            # la base et le pool sont réutilisés depuis une nouvelle boucle
+            premier = asyncio.run(pool.backbone(gs, LITERALS))
+            gs.push_clause([-5])
+            second = asyncio.run(pool.backbone(gs, LITERALS))
+        finally:
+            pool.close()
+
+        self.assertEqual(premier, [3])
+        self.assertEqual(second, base_avec([[-5]]).backbone(LITERALS))
+
+    def test_requetes_concurrentes(self):
+        # avec une seule place, les requêtes attendent le sémaphore dans
+        # chacune des deux boucles
+        pool = SolverPool(backend="cdcl", max_concurrency=1)
+
+        async def requetes():
+            return await asyncio.gather(
+                *(pool.solve(CLAUSES, [lit]) for lit in LITERALS)
+            )
+
+        try:
+            premier = asyncio.run(requetes())
+            second = asyncio.run(requetes())
+        finally:
+            pool.close()
+
+        self.assertEqual([sat for sat, _ in premier], [sat for sat, _ in second])
+        self.assertEqual([sat for sat, _ in premier], [True, False, True, True, True, True])
+
+    def test_boucles_privees(self):
+        pool = SolverPool(backend="cdcl", max_concurrency=1)
+        try:
+            gs = base()
+            for _ in range(2):
+                # la tâche de satisfiabilité de gs ne passe pas d'une boucle
+                # à l'autre
+                loop = asyncio.new_event_loop()
+                try:
+                    self.assertTrue(loop.run_until_complete(pool.satisfiable(gs)))
+                    self.assertTrue(loop.run_until_complete(pool.entails(base(), 3)))
+                finally:
+                    loop.close()
+        finally:
+            pool.close()
+
+
+def base_avec(clauses):
+    gs = base()
+    for clause in clauses:
+        gs.push_clause(clause)
+    return gs
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import unittest
+
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import tiling
+import wumpusfinal as wf
+
+from solverpool import SolverPool
+
+"""
+Parcours par tuiles avec un SolverPool partagé : le même pool doit servir à
+plusieurs mondes de suite, chaque parcours fermant sa boucle privée, et
+donner les mêmes sondes que le parcours sans pool.
+"""
+
+N = 10
+SEEDS = [0, 1]
+
+
+def parcours(seed, pool=None):
+    ww = wf.WumpusWorld(N, True, seed=seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        kb = tiling.parcours_tuiles(ww, tile_size=4, halo=2, pool=pool)
+    return ww.get_cost(), sorted(kb.get_forced_literals()), kb
+
+
+class TestTiling(unittest.TestCase):
+    def test_pool_partage(self):
+        boucles = []
+        nouvelle = asyncio.new_event_loop
+
+        def noter():
+            loop = nouvelle()
+            boucles.append(loop)
+            return loop
+
+        pool = SolverPool(backend="cdcl", max_concurrency=1)
+        try:
+            with mock.patch("tiling.asyncio.new_event_loop", noter):
+                res = [parcours(seed, pool) for seed in SEEDS]
+        finally:
+            pool.close()
+
+        self.assertGreaterEqual(len(boucles), len(SEEDS))
+        self.assertTrue(all(loop.is_closed() for loop in boucles))
+        for seed, (cost, forced, kb) in zip(SEEDS, res):
+            with self.subTest(seed=seed):
+                self.assertEqual(kb.live_tiles(), 0)
+                self.assertEqual((cost, forced), parcours(seed)[:2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import wumpusfinal as wf
+
+"""
+Mondes imposés à WumpusWorld : la grille donnée doit avoir la taille n
+annoncée, sinon ValueError.
+"""
+
+
+class TestWumpusWorld(unittest.TestCase):
+    def test_monde_impose(self):
+        ww = wf.WumpusWorld(4, world=wf.world1)
+        self.assertEqual(ww.get_n(), 4)
+        self.assertEqual(len(ww.get_cells()), 16)
+
+    def test_taille_incorrecte(self):
+        with self.assertRaises(ValueError):
+            wf.WumpusWorld(5, world=wf.world1)
+        with self.assertRaises(ValueError):
+            wf.WumpusWorld(4, world=wf.world1[:3])
+        with self.assertRaises(ValueError):
+            wf.WumpusWorld(4, world=[ligne[:3] for ligne in wf.world1])
+        with self.assertRaises(ValueError):
+            wf.WumpusWorld(4, world=bytes(15))
+
+
+if __name__ == "__main__":
+    unittest.main()
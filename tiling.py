@@ -0,0 +1,392 @@
+import asyncio
+
+from array import array
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from gopherpysat import ClauseArena, Gophersat, SolverStats
+from grille import voisins
+from wumpuscnf import KINDS, KIND_INDEX, WumpusVoc, unvar
+
+__author__ = "Alicia BOULLEE, Simon DEVAUCHELLE,"
+__copyright__ = "Copyright 2020, UTC"
+__license__ = "LGPL-3.0"
+__version__ = "0.1.0"
+__maintainer__ = "Alicia BOULLEE? Simon DEVAUCHELLE"
+__email__ = "alicia.boullee@etu.utc.fr"
+__status__ = "dev"
+
+"""
+Exploration par tuiles pour les très grandes cartes.
+
+La grille est découpée en tuiles carrées ; chaque tuile raisonne avec sa
+propre base, limitée à sa région (la tuile élargie d'un halo de cases). Les
+règles d'une région sont celles de la base complète dont toutes les cases
+sont dans la région : une tuile ne déduit donc que ce que la base complète
+déduirait, seules des déductions lointaines peuvent lui échapper.
+
+TiledKnowledge se présente comme une base Gophersat (get_voc, push_clause,
+backbone, ...) : parcours_map comme parcours_frontiere s'en servent sans
+modification, parcours_tuiles utilise le second, incrémental.
+
+- chaque fait perçu est gardé dans un tableau global d'un octet par variable
+  et transmis à toutes les tuiles dont la région contient la case : c'est
+  l'échange des faits de bord entre tuiles voisines ;
+- une question sur une case est posée à la tuile qui la contient ;
+- les tuiles sont créées à la première question (avec les faits déjà
+  connus de leur région) et libérées dès que toutes leurs cases sont
+  connues, la mémoire suit donc la frontière et non la carte.
+"""
+
+TILE_SIZE = 16
+HALO = 3
+
+# valeur d'une variable dans le tableau des faits
+INCONNU = 0
+VRAI = 1
+FAUX = 2
+
+Region = Tuple[int, int, int, int]
+
+_templates: Dict[Tuple, ClauseArena] = {}
+
+
+# Vocabulaire d'une région : coordonnées globales, numérotation locale
+class RegionVoc(Sequence[str]):
+    def __init__(self, n: int, region: Region):
+        self.__n = n
+        self.__i0, self.__j0, self.__h, self.__w = region
+        # variable globale de chaque variable locale
+        self.__globales = array("i", [0])
+        for k in range(self.__h * self.__w):
+            i, j = self.__i0 + k // self.__w, self.__j0 + k % self.__w
+            base = (i * n + j) * 5 + 1
+            self.__globales.extend(range(base, base + 5))
+
+    def get_n(self) -> int:
+        return self.__n
+
+    def contains(self, i: int, j: int) -> bool:
+        return 0 <= i - self.__i0 < self.__h and 0 <= j - self.__j0 < self.__w
+
+    def var(self, kind: str, i: int, j: int) -> int:
+        return ((i - self.__i0) * self.__w + j - self.__j0) * 5 + KIND_INDEX[kind] + 1
+
+    def globales(self, literals: List[int]) -> List[int]:
+        # littéraux locaux vers littéraux globaux
+        g = self.__globales
+        return [g[v] if v > 0 else -g[-v] for v in literals]
+
+    def locales(self, literals: List[int]) -> List[int]:
+        # littéraux globaux (de cases de la région) vers littéraux locaux
+        n, i0, j0, w = self.__n, self.__i0, self.__j0, self.__w
+        res = []
+        for v in literals:
+            cell, k = divmod(abs(v) - 1, 5)
+            i, j = divmod(cell, n)
+            local = ((i - i0) * w + j - j0) * 5 + k + 1
+            res.append(local if v > 0 else -local)
+        return res
+
+    def cell(self, v: int) -> Tuple[str, int, int]:
+        cell, k = divmod(abs(v) - 1, 5)
+        return KINDS[k], self.__i0 + cell // self.__w, self.__j0 + cell % self.__w
+
+    def __len__(self) -> int:
+        return 5 * self.__h * self.__w
+
+    def __getitem__(self, index: int) -> str:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("variable index out of range")
+        kind, i, j = self.cell(index + 1)
+        return f"{kind}({i},{j})"
+
+    def __iter__(self) -> Iterator[str]:
+        return (self[index] for index in range(len(self)))
+
+
+def generate_region(n: int, region: Region) -> ClauseArena:
+    # règles de generate_template dont toutes les cases sont dans la région
+    i0, j0, h, w = region
+    voc = RegionVoc(n, region)
+    v = voc.var
+    arena = ClauseArena()
+
+    if voc.contains(0, 0):
+        arena.push([-v("P", 0, 0)])
+        arena.push([-v("W", 0, 0)])
+
+    for i in range(i0, i0 + h):
+        for j in range(j0, j0 + w):
+            arena.push([-v("W", i, j), -v("P", i, j)])
+            arena.push([-v("W", i, j), -v("G", i, j)])
+            arena.push([-v("P", i, j), -v("G", i, j)])
+
+            autour = voisins(i, j, n)
+            dedans = [(a, b) for a, b in autour if voc.contains(a, b)]
+            for a, b in dedans:
+                arena.push([-v("P", a, b), v("B", i, j)])
+                arena.push([-v("W", a, b), v("S", i, j)])
+            if len(dedans) == len(autour):
+                arena.push([-v("B", i, j)] + [v("P", a, b) for a, b in autour])
+                arena.push([-v("S", i, j)] + [v("W", a, b) for a, b in autour])
+
+    return arena
+
+
+def region_template(n: int, region: Region) -> ClauseArena:
+    # les règles ne dépendent que de la forme de la région et des bords de
+    # la grille qu'elle touche
+    i0, j0, h, w = region
+    key = (h, w, i0 == 0, j0 == 0, i0 + h == n, j0 + w == n)
+    if key not in _templates:
+        _templates[key] = generate_region(n, region)
+    return _templates[key]
+
+
+class TiledKnowledge:
+    def __init__(
+        self,
+        n: int,
+        gophersat_exec: str = "gophersat",
+        backend: str = "cdcl",
+        tile_size: int = TILE_SIZE,
+        halo: int = HALO,
+        pool=None,
+        stats: Optional[SolverStats] = None,
+    ):
+        self.__n = n
+        self.__voc = WumpusVoc(n)
+        self.__executable = gophersat_exec
+        self.__backend = backend
+        self.__tile_size = tile_size
+        self.__halo = halo
+        self.__pool = pool
+        self.__loop: Optional[asyncio.AbstractEventLoop] = None
+        self.__stats = stats
+        self.__version = 0
+
+        # un octet par variable globale : INCONNU, VRAI ou FAUX
+        self.__faits = bytearray(5 * n * n + 1)
+        # les mêmes faits sous forme de littéraux
+        self.__litteraux = set()
+        # cases connues (brise perçue) dans le cœur de chaque tuile ; la case
+        # de départ est toujours sondée en premier, même si parcours_map
+        # n'ajoute pas ses percepts à la base
+        nt = -(-n // tile_size)
+        self.__connues = [0] * (nt * nt)
+        self.__connues[0] = 1
+        self.__tiles: Dict[int, Tuple[Gophersat, RegionVoc]] = {}
+        self.__tile_num = 0
+        # littéraux forcés de chaque tuile, traduits, avec la version de la tuile
+        self.__forcees: Dict[int, Tuple[int, List[int]]] = {}
+
+    # --- interface Gophersat utilisée par parcours_map ---
+
+    def get_voc(self) -> WumpusVoc:
+        return self.__voc
+
+    def version(self) -> int:
+        return self.__version
+
+    def stats(self) -> Optional[SolverStats]:
+        return self.__stats
+
+    def push_clause(self, clause: List[int]):
+        # seuls des faits (clauses unitaires) sont échangés entre tuiles
+        if len(clause) != 1:
+            raise ValueError("tiled knowledge only accepts unit clauses")
+        lit = clause[0]
+        valeur = VRAI if lit > 0 else FAUX
+        avant = self.__faits[abs(lit)]
+        if avant == valeur:
+            return
+        self.__faits[abs(lit)] = valeur
+        self.__litteraux.discard(-lit)
+        self.__litteraux.add(lit)
+        self.__version += 1
+
+        kind, i, j = unvar(lit, self.__n)
+        for t in self.__tiles_of(i, j):
+            gs, voc = self.__tiles[t]
+            local = voc.var(kind, i, j)
+            gs.push_clause([local if lit > 0 else -local])
+
+        if kind == "B" and avant == INCONNU and (i, j) != (0, 0):
+            t = self.__owner(i, j)
+            self.__connues[t] += 1
+            if self.__connues[t] == self.__core_size(t) and t in self.__tiles:
+                # tout le cœur est connu : la tuile ne sera plus interrogée
+                self.__tiles.pop(t)[0].close()
+                self.__forcees.pop(t, None)
+
+    def entails(self, literal: int) -> bool:
+        return literal in self.backbone([literal])
+
+    def backbone(self, literals: List[int]) -> List[int]:
+        entailed = []
+        groupes: Dict[int, List[int]] = {}
+        for lit in literals:
+            fait = self.__faits[abs(lit)]
+            if fait != INCONNU:
+                if fait == (VRAI if lit > 0 else FAUX):
+                    entailed.append(lit)
+                continue
+            _, i, j = unvar(lit, self.__n)
+            groupes.setdefault(self.__owner(i, j), []).append(lit)
+
+        if self.__pool is not None and len(groupes) > 1:
+            # boucle privée, fermée par close() ; le pool crée son sémaphore
+            # pour chaque boucle et peut donc servir à plusieurs bases
+            if self.__loop is None:
+                self.__loop = asyncio.new_event_loop()
+            resultats = self.__loop.run_until_complete(self.__backbone_tiles(groupes))
+        else:
+            resultats = [self.__backbone_tile(t, l) for t, l in groupes.items()]
+
+        for res in resultats:
+            entailed += res
+        kept = set(entailed)
+        return [lit for lit in literals if lit in kept]
+
+    def get_forced_literals(self) -> List[int]:
+        forced = set(self.__litteraux)
+        for t, (gs, voc) in self.__tiles.items():
+            # une tuile qui n'a pas changé depuis l'appel précédent n'est
+            # pas retraduite
+            version, litteraux = self.__forcees.get(t, (-1, []))
+            if version != gs.version():
+                litteraux = voc.globales(gs.get_forced_literals())
+                self.__forcees[t] = (gs.version(), litteraux)
+            forced.update(litteraux)
+        return list(forced)
+
+    def tile_num(self) -> int:
+        # nombre de tuiles créées depuis le début (libérées comprises)
+        return self.__tile_num
+
+    def live_tiles(self) -> int:
+        return len(self.__tiles)
+
+    def close(self):
+        for gs, _ in self.__tiles.values():
+            gs.close()
+        self.__tiles.clear()
+        self.__forcees.clear()
+        if self.__loop is not None:
+            self.__loop.close()
+            self.__loop = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    # --- tuiles ---
+
+    def __owner(self, i: int, j: int) -> int:
+        nt = -(-self.__n // self.__tile_size)
+        return (i // self.__tile_size) * nt + j // self.__tile_size
+
+    def __core(self, t: int) -> Region:
+        nt = -(-self.__n // self.__tile_size)
+        i0 = (t // nt) * self.__tile_size
+        j0 = (t % nt) * self.__tile_size
+        return (
+            i0,
+            j0,
+            min(self.__tile_size, self.__n - i0),
+            min(self.__tile_size, self.__n - j0),
+        )
+
+    def __core_size(self, t: int) -> int:
+        _, _, h, w = self.__core(t)
+        return h * w
+
+    def __region(self, t: int) -> Region:
+        i0, j0, h, w = self.__core(t)
+        a, b = max(0, i0 - self.__halo), max(0, j0 - self.__halo)
+        c = min(self.__n, i0 + h + self.__halo)
+        d = min(self.__n, j0 + w + self.__halo)
+        return a, b, c - a, d - b
+
+    def __tiles_of(self, i: int, j: int) -> List[int]:
+        # tuiles vivantes dont la région contient (i, j)
+        return [t for t, (_, voc) in self.__tiles.items() if voc.contains(i, j)]
+
+    def __tile(self, t: int) -> Tuple[Gophersat, RegionVoc]:
+        if t not in self.__tiles:
+            region = self.__region(t)
+            voc = RegionVoc(self.__n, region)
+            gs = Gophersat(
+                self.__executable,
+                voc,
+                session=True,
+                backend=self.__backend,
+                stats=self.__stats,
+            )
+            gs.push_clauses(region_template(self.__n, region))
+            gs.freeze()
+
+            # faits déjà connus dans la région
+            i0, j0, h, w = region
+            for i in range(i0, i0 + h):
+                for j in range(j0, j0 + w):
+                    for kind in KINDS:
+                        f = self.__faits[self.__voc.var(kind, i, j)]
+                        if f != INCONNU:
+                            local = voc.var(kind, i, j)
+                            gs.push_clause([local if f == VRAI else -local])
+
+            self.__tiles[t] = (gs, voc)
+            self.__tile_num += 1
+
+        return self.__tiles[t]
+
+    def __backbone_tile(self, t: int, literals: List[int]) -> List[int]:
+        gs, voc = self.__tile(t)
+        res = gs.backbone(voc.locales(literals))
+        return voc.globales(res)
+
+    async def __backbone_tiles(self, groupes: Dict[int, List[int]]) -> List[List[int]]:
+        # une tâche par tuile, toutes attendues ensemble
+        return await asyncio.gather(
+            *(self.__backbone_pool(t, l) for t, l in groupes.items())
+        )
+
+    async def __backbone_pool(self, t: int, literals: List[int]) -> List[int]:
+        gs, voc = self.__tile(t)
+        res = await self.__pool.backbone(gs, voc.locales(literals))
+        return voc.globales(res)
+
+
+def parcours_tuiles(
+    ww,
+    tile_size: int = TILE_SIZE,
+    halo: int = HALO,
+    pool=None,
+    stats: Optional[SolverStats] = None,
+) -> TiledKnowledge:
+    # parcours incrémental de la frontière, avec une base par tuile
+    import wumpusfinal as wf
+
+    kb = TiledKnowledge(
+        ww.get_n(),
+        wf.gophersat_exec,
+        wf.gophersat_backend,
+        tile_size,
+        halo,
+        pool,
+        stats,
+    )
+    try:
+        wf.parcours_frontiere(ww, kb)
+    finally:
+        # tuiles et boucle privée libérées même si le parcours échoue ; les
+        # faits restent lisibles (get_forced_literals) et les tuiles seraient
+        # recréées à une nouvelle question
+        kb.close()
+
+    return kb
@@ -0,0 +1,115 @@
+import struct
+
+from typing import BinaryIO, Iterable, Iterator, TextIO, Tuple
+
+from worldgen import LETTRES, coder_case
+
+__author__ = "Alicia BOULLEE, Simon DEVAUCHELLE,"
+__copyright__ = "Copyright 2020, UTC"
+__license__ = "LGPL-3.0"
+__version__ = "0.1.0"
+__maintainer__ = "Alicia BOULLEE? Simon DEVAUCHELLE"
+__email__ = "alicia.boullee@etu.utc.fr"
+__status__ = "dev"
+
+"""
+Fichiers de mondes du Wumpus, pour rejouer ou comparer sur les mêmes cartes.
+
+Un monde est un couple (n, cases) où cases contient un octet par case
+i * n + j, codé comme dans worldgen. Deux formats, lus au fil de l'eau :
+
+- binaire (.wmp) : MONDE_MAGIC, puis pour chaque monde n sur 4 octets
+  suivi des n * n octets des cases ;
+- texte : n sur une ligne, puis n lignes de cases séparées par des espaces
+  (comme afficherMap, "." pour une case vide), une ligne vide entre mondes.
+
+WumpusWorld(n, world=cases) recrée le monde lu.
+"""
+
+MONDE_MAGIC = b"WMPW\x01"
+EXTENSION_BINAIRE = ".wmp"
+
+Monde = Tuple[int, bytes]
+
+_TAILLE = struct.Struct("<I")
+
+# lecture du texte : une case écrite par ecrire_texte est décodée d'un accès
+_CODES = {lettres: k for k, lettres in enumerate(LETTRES)}
+
+
+def _code(contenu: str) -> int:
+    return _CODES[contenu] if contenu in _CODES else coder_case(contenu)
+
+
+def ecrire_binaire(f: BinaryIO, mondes: Iterable[Monde]):
+    f.write(MONDE_MAGIC)
+    for n, cases in mondes:
+        if len(cases) != n * n:
+            raise ValueError(f"expected {n * n} cells, got {len(cases)}")
+        f.write(_TAILLE.pack(n))
+        f.write(cases)
+
+
+def lire_binaire(f: BinaryIO) -> Iterator[Monde]:
+    if f.read(len(MONDE_MAGIC)) != MONDE_MAGIC:
+        raise ValueError("not a wumpus world file")
+
+    while True:
+        entete = f.read(_TAILLE.size)
+        if not entete:
+            return
+        if len(entete) != _TAILLE.size:
+            raise ValueError("truncated wumpus world file")
+        (n,) = _TAILLE.unpack(entete)
+        cases = f.read(n * n)
+        if len(cases) != n * n:
+            raise ValueError("truncated wumpus world file")
+        yield n, cases
+
+
+def ecrire_texte(f: TextIO, mondes: Iterable[Monde]):
+    premier = True
+    for n, cases in mondes:
+        if len(cases) != n * n:
+            raise ValueError(f"expected {n * n} cells, got {len(cases)}")
+        if not premier:
+            f.write("\n")
+        premier = False
+        f.write(f"{n}\n")
+        for i in range(n):
+            f.write(" ".join(LETTRES[k] for k in cases[i * n : (i + 1) * n]))
+            f.write("\n")
+
+
+def lire_texte(f: TextIO) -> Iterator[Monde]:
+    lignes = (l.strip() for l in f)
+    for ligne in lignes:
+        if not ligne:
+            continue
+        n = int(ligne)
+        cases = bytearray()
+        for i in range(n):
+            contenu = next(lignes, "").split()
+            if len(contenu) != n:
+                raise ValueError(f"row {i} of a {n}x{n} world has {len(contenu)} cells")
+            cases.extend(map(_code, contenu))
+        yield n, bytes(cases)
+
+
+def sauver_mondes(path: str, mondes: Iterable[Monde]):
+    # le format est choisi d'après l'extension du fichier
+    if path.endswith(EXTENSION_BINAIRE):
+        with open(path, "wb") as f:
+            ecrire_binaire(f, mondes)
+    else:
+        with open(path, "w", newline="\n") as f:
+            ecrire_texte(f, mondes)
+
+
+def charger_mondes(path: str) -> Iterator[Monde]:
+    if path.endswith(EXTENSION_BINAIRE):
+        with open(path, "rb") as f:
+            yield from lire_binaire(f)
+    else:
+        with open(path) as f:
+            yield from lire_texte(f)
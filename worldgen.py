@@ -0,0 +1,108 @@
+from typing import List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # numpy est facultatif : seul ce module en a besoin
+    np = None
+
+__author__ = "Alicia BOULLEE, Simon DEVAUCHELLE,"
+__copyright__ = "Copyright 2020, UTC"
+__license__ = "LGPL-3.0"
+__version__ = "0.1.0"
+__maintainer__ = "Alicia BOULLEE? Simon DEVAUCHELLE"
+__email__ = "alicia.boullee@etu.utc.fr"
+__status__ = "dev"
+
+"""
+Génération vectorisée de mondes du Wumpus avec NumPy.
+
+Le monde est une grille d'entiers dont chaque bit marque un élément de la
+case. Puits et or sont tirés d'un coup pour toute la grille, odeurs et
+brises s'obtiennent par OU de la grille décalée d'une case dans les quatre
+directions. vers_chaines donne le format texte de WumpusWorld.
+"""
+
+# Un bit par élément d'une case
+W = 1
+P = 2
+G = 4
+S = 8
+B = 16
+
+BITS = (("W", W), ("P", P), ("G", G), ("S", S), ("B", B))
+
+# Contenu texte d'une case selon ses bits, dans l'ordre de random_world
+LETTRES = ["".join(c for c, bit in BITS if k & bit) or "." for k in range(32)]
+
+
+def coder_case(content: str) -> int:
+    return sum(bit for c, bit in BITS if c in content)
+
+
+def coder_monde(world: List[List[str]]) -> bytearray:
+    # un octet par case i * n + j, même codage que la grille NumPy
+    return bytearray(coder_case(content) for ligne in world for content in ligne)
+
+
+def _numpy():
+    if np is None:
+        raise ImportError("worldgen requires numpy (pip install numpy)")
+    return np
+
+
+def voisinage(masque: "np.ndarray") -> "np.ndarray":
+    # cases ayant au moins un voisin (4-connexité) dans masque
+    res = _numpy().zeros_like(masque)
+    res[1:, :] |= masque[:-1, :]
+    res[:-1, :] |= masque[1:, :]
+    res[:, 1:] |= masque[:, :-1]
+    res[:, :-1] |= masque[:, 1:]
+    return res
+
+
+def generer_monde(
+    n: int,
+    pit_rate: float = 0.25,
+    gold_rate: float = 0.025,
+    seed: Optional[int] = None,
+) -> "np.ndarray":
+    np = _numpy()
+    rng = np.random.default_rng(seed)
+    taille = n * n
+
+    # un Wumpus hors de la case de départ, une pépite hors de sa case
+    posw = int(rng.integers(1, taille))
+    posg = int(rng.integers(taille - 1))
+    posg += posg >= posw
+
+    wumpus = np.zeros(taille, dtype=bool)
+    wumpus[posw] = True
+    libre = ~wumpus
+    libre[0] = False
+
+    pits = libre & (rng.random(taille) < pit_rate)
+    pits[posg] = False
+    gold = libre & ~pits & (rng.random(taille) < gold_rate)
+    gold[posg] = True
+
+    wumpus = wumpus.reshape(n, n)
+    pits = pits.reshape(n, n)
+    grille = np.zeros((n, n), dtype=np.uint8)
+    grille[wumpus] |= W
+    grille[pits] |= P
+    grille[gold.reshape(n, n)] |= G
+    grille[voisinage(wumpus)] |= S
+    grille[voisinage(pits)] |= B
+
+    return grille
+
+
+def vers_chaines(grille: "np.ndarray") -> List[List[str]]:
+    lettres = LETTRES
+    return [[lettres[k] for k in ligne] for ligne in grille.tolist()]
+
+
+def depuis_chaines(world: List[List[str]]) -> "np.ndarray":
+    np = _numpy()
+    n = len(world)
+    return np.frombuffer(coder_monde(world), dtype=np.uint8).reshape(n, n).copy()
@@ -0,0 +1,169 @@
+import os
+
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from gopherpysat import ClauseArena, Gophersat
+from grille import voisins
+
+__author__ = "Alicia BOULLEE, Simon DEVAUCHELLE,"
+__copyright__ = "Copyright 2020, UTC"
+__license__ = "LGPL-3.0"
+__version__ = "0.1.0"
+__maintainer__ = "Alicia BOULLEE? Simon DEVAUCHELLE"
+__email__ = "alicia.boullee@etu.utc.fr"
+__status__ = "dev"
+
+"""
+Base de règles du monde du Wumpus, générée directement en entiers.
+
+Les règles ne dépendent que de la taille n de la grille : elles sont
+calculées une fois par n, gardées en mémoire et, si un répertoire de cache
+est donné, enregistrées sur disque.
+"""
+
+# Ordre des variables de chaque case, identique au vocabulaire historique
+KINDS = "GSBWP"
+KIND_INDEX = {k: idx for idx, k in enumerate(KINDS)}
+
+# Classes d'une case de la frontière
+SAFE = "safe"
+PIT = "pit"
+WUMPUS = "wumpus"
+UNKNOWN = "unknown"
+
+CNF_CACHE_DIR: Optional[str] = None
+
+_templates: Dict[int, ClauseArena] = {}
+
+
+def var(kind: str, i: int, j: int, n: int) -> int:
+    return (i * n + j) * 5 + KIND_INDEX[kind] + 1
+
+
+def unvar(v: int, n: int) -> Tuple[str, int, int]:
+    cell, k = divmod(abs(v) - 1, 5)
+    return KINDS[k], cell // n, cell % n
+
+
+# Vocabulaire paresseux : les noms "P(i,j)" ne sont calculés qu'à l'affichage
+class WumpusVoc(Sequence[str]):
+    def __init__(self, n: int):
+        self.__n = n
+
+    def get_n(self) -> int:
+        return self.__n
+
+    def var(self, kind: str, i: int, j: int) -> int:
+        return (i * self.__n + j) * 5 + KIND_INDEX[kind] + 1
+
+    def __len__(self) -> int:
+        return 5 * self.__n * self.__n
+
+    def __getitem__(self, index: int) -> str:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("variable index out of range")
+        kind, i, j = unvar(index + 1, self.__n)
+        return f"{kind}({i},{j})"
+
+    def __iter__(self) -> Iterator[str]:
+        return (self[index] for index in range(len(self)))
+
+
+def generate_template(n: int) -> ClauseArena:
+    arena = ClauseArena()
+
+    def v(kind, i, j):
+        return var(kind, i, j, n)
+
+    arena.push([-v("P", 0, 0)])
+    arena.push([-v("W", 0, 0)])
+
+    for i in range(n):
+        for j in range(n):
+            arena.push([-v("W", i, j), -v("P", i, j)])
+            arena.push([-v("W", i, j), -v("G", i, j)])
+            arena.push([-v("P", i, j), -v("G", i, j)])
+
+            autour = voisins(i, j, n)
+            for a, b in autour:
+                arena.push([-v("P", a, b), v("B", i, j)])
+                arena.push([-v("W", a, b), v("S", i, j)])
+            arena.push([-v("B", i, j)] + [v("P", a, b) for a, b in autour])
+            arena.push([-v("S", i, j)] + [v("W", a, b) for a, b in autour])
+
+    return arena
+
+
+def wumpus_template(n: int, cache_dir: Optional[str] = None) -> ClauseArena:
+    if n in _templates:
+        return _templates[n]
+
+    cache_dir = cache_dir or CNF_CACHE_DIR
+    path = os.path.join(cache_dir, f"wumpus-{n}.arena") if cache_dir else None
+
+    if path is not None and os.path.exists(path):
+        with open(path, "rb") as f:
+            arena = ClauseArena.read_from(f)
+    else:
+        arena = generate_template(n)
+        if path is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}"
+            with open(tmp, "wb") as f:
+                arena.write_to(f)
+            os.replace(tmp, path)
+
+    _templates[n] = arena
+    return arena
+
+
+def frontier_literals(gs: Gophersat, cells: Iterable[Tuple[int, int]], wfound: bool = False):
+    # littéraux à tester pour classer les cases : mêmes tests et même ordre
+    # que clause_deducted (Wumpus, puits, puis sûre)
+    var = gs.get_voc().var
+    cells = list(dict.fromkeys((c[0], c[1]) for c in cells))
+
+    literals = []
+    for i, j in cells:
+        if not wfound:
+            literals.append(var("W", i, j))
+        literals += [var("P", i, j), -var("P", i, j), -var("W", i, j)]
+
+    return cells, literals
+
+
+def classes_of(
+    gs: Gophersat, cells: List[Tuple[int, int]], entailed: set, wfound: bool = False
+) -> Dict[Tuple[int, int], str]:
+    var = gs.get_voc().var
+    res = {}
+    for i, j in cells:
+        if not wfound and var("W", i, j) in entailed:
+            res[(i, j)] = WUMPUS
+        elif var("P", i, j) in entailed:
+            res[(i, j)] = PIT
+        elif -var("P", i, j) in entailed and -var("W", i, j) in entailed:
+            res[(i, j)] = SAFE
+        else:
+            res[(i, j)] = UNKNOWN
+
+    return res
+
+
+def classify_cells(
+    gs: Gophersat, cells: Iterable[Tuple[int, int]], wfound: bool = False
+) -> Dict[Tuple[int, int], str]:
+    # Une seule interrogation du solveur pour toute la frontière
+    cells, literals = frontier_literals(gs, cells, wfound)
+    return classes_of(gs, cells, set(gs.backbone(literals)), wfound)
+
+
+async def classify_cells_async(
+    pool, gs: Gophersat, cells: Iterable[Tuple[int, int]], wfound: bool = False
+) -> Dict[Tuple[int, int], str]:
+    # Même classement, les implications étant demandées toutes ensemble à
+    # un solverpool.SolverPool
+    cells, literals = frontier_literals(gs, cells, wfound)
+    return classes_of(gs, cells, set(await pool.backbone(gs, literals)), wfound)
@@ -1,7 +1,17 @@
-from typing import Dict, Tuple, List, Union
+from typing import Dict, Tuple, List, Optional, Sequence, Union
 from gopherpysat import Gophersat
+from grille import voisins
+from wumpuscnf import WumpusVoc, wumpus_template, classify_cells
+from wumpuscnf import SAFE, PIT, WUMPUS, UNKNOWN
+from planning import champs_distances, chemin_champ, matrice_distances
+from planning import planifier_tournee
+from risque import case_moins_risquee, composantes, probabilites_danger
+from worldgen import W, P, G, LETTRES, coder_monde
 import time
 import random
+import heapq
+from array import array
+from collections import deque
 
 
 __author__ = "Alicia BOULLEE, Simon DEVAUCHELLE,"
@@ -36,6 +46,8 @@ world1 = [
 
 
 gophersat_exec = "C:/Users/Simon/Desktop/projet_ia02/gophersat-1.1.6"
+# "cdcl" : solveur intégré en Python, "exec" : exécutable gophersat ci-dessus
+gophersat_backend = "cdcl"
     
 
 rand = random.Random()
@@ -80,34 +92,39 @@ def compute_empty(world: List[List[str]], n: int) -> List[List[str]]:
     return world
 
 
-def random_world(n: int, pit_rate: float = 0.25, gold_rate: float = 0.025):
+def random_world(
+    n: int,
+    pit_rate: float = RATES["pit_rate"],
+    gold_rate: float = RATES["gold_rate"],
+    seed: Optional[int] = None,
+):
+    # Avec une graine, le même monde est regénéré à chaque appel
+    r = random.Random(seed) if seed is not None else rand
+
     # On commence par générer un monde vide
     world = [[""] * n for i in range(n)]
 
     # On génère aléatoirement la case sur laquelle va se trouver le Wumpus
-    posw = (rand.randrange(n), rand.randrange(n))
+    posw = (r.randrange(n), r.randrange(n))
     while posw == (0, 0):
-        posw = (rand.randrange(n), rand.randrange(n))
+        posw = (r.randrange(n), r.randrange(n))
     x, y = posw
     world[x][y] = "W"
 
     # On ajoute aléatoirement une pépite d'or (au minimum) sur la carte
-    posg = (rand.randrange(n), rand.randrange(n))
+    posg = (r.randrange(n), r.randrange(n))
     while posg == posw:
-        posg = (rand.randrange(n), rand.randrange(n))
+        posg = (r.randrange(n), r.randrange(n))
     x, y = posg
     world[x][y] = "G"
 
     for i in range(n):
         for j in range(n):
             if (i, j) != (0, 0) and "W" not in world[i][j]:
-                r = rand.random()
-                if r < RATES["pit_rate"] and "G" not in world[i][j]:
-
+                if r.random() < pit_rate and "G" not in world[i][j]:
                     world[i][j] += "P"
 
-                r = random.random()
-                if r < RATES["gold_rate"] and "P" not in world[i][j]:
+                if r.random() < gold_rate and "P" not in world[i][j]:
                     world[i][j] += "G"
                     
     world = compute_stench(world, n)
@@ -128,18 +145,86 @@ def afficherMap(world: List[List[str]]) -> None:
     print
 
 
+# Vue en lecture seule de la carte connue : rien n'est copié, chaque case
+# est décodée au moment où on la lit ("?" si elle n'a pas été sondée)
+class KnowledgeView(Sequence):
+    def __init__(self, cells: bytearray, knowledge: bytearray, n: int):
+        self.__cells = cells
+        self.__knowledge = knowledge
+        self.__n = n
+
+    def __len__(self) -> int:
+        return self.__n
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[k] for k in range(*i.indices(self.__n))]
+        if i < 0:
+            i += self.__n
+        if not 0 <= i < self.__n:
+            raise IndexError("row index out of range")
+        return KnowledgeRow(self.__cells, self.__knowledge, i * self.__n, self.__n)
+
+    def __repr__(self) -> str:
+        return repr([list(ligne) for ligne in self])
+
+
+class KnowledgeRow(Sequence):
+    def __init__(self, cells: bytearray, knowledge: bytearray, start: int, n: int):
+        self.__cells = cells
+        self.__knowledge = knowledge
+        self.__start = start
+        self.__n = n
+
+    def __len__(self) -> int:
+        return self.__n
+
+    def __getitem__(self, j):
+        if isinstance(j, slice):
+            return [self[k] for k in range(*j.indices(self.__n))]
+        if j < 0:
+            j += self.__n
+        if not 0 <= j < self.__n:
+            raise IndexError("column index out of range")
+        k = self.__start + j
+        return LETTRES[self.__cells[k]] if self.__knowledge[k] else "?"
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
 class WumpusWorld:
-    def __init__(self, n: int = 4, rand: bool = False):
+    def __init__(
+        self,
+        n: int = 4,
+        rand: bool = False,
+        seed: Optional[int] = None,
+        world: Optional[Union[List[List[str]], bytes]] = None,
+    ):
         self.__N = n
-        self.__knowledge = [[False] * self.__N for i in range(self.__N)]
-
-        if rand:
-            self.__world = random_world(self.__N)
+        self.__knowledge = bytearray(n * n)
+
+        if world is not None:
+            # monde imposé : grille de chaînes ou cases codées (worldfile)
+            if isinstance(world, (bytes, bytearray)):
+                if len(world) != n * n:
+                    raise ValueError(f"expected {n * n} cells, got {len(world)}")
+                self.__cells = bytearray(world)
+            else:
+                if len(world) != n:
+                    raise ValueError(f"expected {n} rows, got {len(world)}")
+                for i, ligne in enumerate(world):
+                    if len(ligne) != n:
+                        raise ValueError(f"row {i} of a {n}x{n} world has {len(ligne)} cells")
+                self.__cells = coder_monde(world)
+        elif rand:
+            self.__cells = coder_monde(random_world(self.__N, seed=seed))
         else:
-            self.__world = world1
-            self.__world = compute_stench(self.__world, self.__N)
-            self.__world = compute_breeze(self.__world, self.__N)
-            self.__world = compute_empty(self.__world, self.__N)
+            world = world1
+            world = compute_stench(world, self.__N)
+            world = compute_breeze(world, self.__N)
+            world = compute_empty(world, self.__N)
+            self.__cells = coder_monde(world)
 
         self.__position = (0, 0)
         self.__dead = False
@@ -151,15 +236,11 @@ class WumpusWorld:
     def get_n(self):
         return self.__N
 
-    def get_knowledge(self):
-        res = [["?"] * self.__N for i in range(self.__N)]
-
-        for i in range(self.__N):
-            for j in range(self.__N):
-                if self.__knowledge[i][j]:
-                    res[i][j] = self.__world[i][j]
+    def get_cells(self) -> bytes:
+        return bytes(self.__cells)
 
-        return res
+    def get_knowledge(self) -> KnowledgeView:
+        return KnowledgeView(self.__cells, self.__knowledge, self.__N)
 
     def get_position(self) -> Tuple[int, int]:
         return self.__position
@@ -169,9 +250,10 @@ class WumpusWorld:
 
         i = self.__position[0]
         j = self.__position[1]
-        self.__knowledge[i][j] = True
+        self.__knowledge[i * self.__N + j] = 1
+        content = LETTRES[self.__cells[i * self.__N + j]]
 
-        return (f"[OK]", f'vous sentez {self.__world[i][j]}"', self.__world[i][j])
+        return (f"[OK]", f'vous sentez {content}"', content)
 
     def get_reward(self) -> int:
         return self.__reward
@@ -191,9 +273,7 @@ class WumpusWorld:
                 -COST["probe"],
             )
 
-        content = self.__world[i][j]
-
-        if "W" in content or "P" in content:
+        if self.__cells[i * self.__N + j] & (W | P):
             self.__cost += COST["failed_probe"]
             return (
                 "[KO]",
@@ -218,9 +298,6 @@ class WumpusWorld:
                 -COST["cautious_probe"],
             )
 
-        self.__position = (i, j)
-        content = self.__world[i][j]
-
         a, b, c = self.get_percepts()
 
         return (a, c, -COST["cautious_probe"])
@@ -239,8 +316,8 @@ class WumpusWorld:
             return ("[err]", "Ce déplacement est impossible ! ", -COST["step"])
 
         self.__position = (i, j)
-        content = self.__world[i][j]
-        if "W" in content:
+        content = self.__cells[i * self.__N + j]
+        if content & W:
             self.__dead = True
             self.__cost += COST["death"]
             return (
@@ -248,7 +325,7 @@ class WumpusWorld:
                 f"Malheureusement, vous avez rencontré le WUmpus, et celui-ci vous a vaincu ! Vous avez perdu ! Dommage !{COST['death']} coins",
                 -COST["death"],
             )
-        if "P" in content:
+        if content & P:
             self.__dead = True
             self.__cost += COST["death"]
             return (
@@ -256,7 +333,7 @@ class WumpusWorld:
                 f"Malheur ! Vous êtes tombés dans un puit ! Vous avez perdu ! Dommage ! {COST['death']} coins",
                 -COST["death"],
             )
-        if "G" in content:
+        if content & G:
             self.__gold_found = True
             self.__reward += REWARD["gold"]
             return (
@@ -272,7 +349,7 @@ class WumpusWorld:
         for i in range(self.__N):
             s += f"{i}:"
             for j in range(self.__N):
-                s += f" {self.__world[i][j]} "
+                s += f" {LETTRES[self.__cells[i * self.__N + j]]} "
             s += "\n"
 
         return s
@@ -299,37 +376,17 @@ class Case:
         if self.parent != None:
             print(" self.parent.pos =", self.parent.pos)
 
-def clause_initialisation(ww):
+def clause_initialisation(ww, stats=None):
     n = ww.get_n()
-    voc = []
-    for i in range(n):
-        for j in range(n):
-            voc.append("G(%s,%s)" % (i,j))
-            voc.append("S(%s,%s)" % (i,j))
-            voc.append("B(%s,%s)" % (i,j))
-            voc.append("W(%s,%s)" % (i,j))
-            voc.append("P(%s,%s)" % (i,j))
-
-    gs = Gophersat(gophersat_exec, voc)
+    # stats (gopherpysat.SolverStats) : mesures du solveur et du parcours
+    gs = Gophersat(
+        gophersat_exec, WumpusVoc(n), session=True, backend=gophersat_backend, stats=stats
+    )
 
-    gs.push_pretty_clause(["-P(0,0)"])
-    gs.push_pretty_clause(["-W(0,0)"])
-
-    for i in range(n):
-        for j in range(n):
-            gs.push_pretty_clause(["-W(%s,%s)" % (i,j), "-P(%s,%s)" % (i,j)])
-            gs.push_pretty_clause(["-W(%s,%s)" % (i,j), "-G(%s,%s)" % (i,j)])
-            gs.push_pretty_clause(["-P(%s,%s)" % (i,j), "-W(%s,%s)" % (i,j)])
-            gs.push_pretty_clause(["-P(%s,%s)" % (i,j), "-G(%s,%s)" % (i,j)])
-            strClausePitBreeze = ["-B(%s,%s)" % (i,j)]
-            strClauseWumpusStench = ["-S(%s,%s)" % (i,j)]
-            for e in successeur1([i, j], n):
-                strClausePitBreeze.append("P(%s,%s)" % (e[0], e[1]))
-                strClauseWumpusStench.append("W(%s,%s)" % (e[0], e[1]))
-                gs.push_pretty_clause(["-P(%s,%s)" % (e[0], e[1]), "B(%s,%s)" % (i,j)])
-                gs.push_pretty_clause(["-W(%s,%s)" % (e[0], e[1]), "S(%s,%s)" % (i,j)])
-            gs.push_pretty_clause(strClausePitBreeze)
-            gs.push_pretty_clause(strClauseWumpusStench)
+    # Les règles ne dépendent que de n : on copie la base précalculée,
+    # puis on fige sa sérialisation puisqu'elle ne changera plus
+    gs.push_clauses(wumpus_template(n))
+    gs.freeze()
 
     return gs
 
@@ -337,166 +394,294 @@ def clause_initialisation(ww):
 def ajouter_clause(gs, c, c_value):
     i = c[0]
     j = c[1]
+    var = gs.get_voc().var
 
-    if c_value.find("B") >= 0:
-        gs.push_pretty_clause(["B(%s,%s)" % (i,j)])
-    else:
-        gs.push_pretty_clause(["-B(%s,%s)" % (i,j)])
-        
-    if c_value.find("S") >= 0:
-        gs.push_pretty_clause(["S(%s,%s)" % (i,j)])
-    else:
-        gs.push_pretty_clause(["-S(%s,%s)" % (i,j)])
-
-    if c_value.find("P") >= 0:
-        gs.push_pretty_clause(["P(%s,%s)" % (i,j)])
-    else:
-        gs.push_pretty_clause(["-P(%s,%s)" % (i,j)])
-
-    if c_value.find("W") >= 0:
-        gs.push_pretty_clause(["W(%s,%s)" % (i,j)])
-    else:
-        gs.push_pretty_clause(["-W(%s,%s)" % (i,j)])
+    # Chaque percept donne un littéral unitaire, positif s'il est présent
+    for kind in "BSPW":
+        v = var(kind, i, j)
+        gs.push_clause([v if kind in c_value else -v])
 
 
 
-def clause_deducted(c, gs, wwr, wfound):
+def clause_deducted(c, gs, wwr, wfound, classe=None):
     i = c[0]
     j = c[1]
-    
-    
- # On commence par vérifier qu'il n'y a pas de Wumpus
-    if(not wfound):
-        gs.push_pretty_clause(["-W(%s,%s)" % (i,j)])
-        if not gs.solve():
-            gs.pop_clause()
-            a, b, c = wwr.cautious_probe(i, j)
-            ajouter_clause(gs, [i,j], b)
-            return True, b, True
-        else:
-            gs.pop_clause()
-            
-            
-#On vérifie ensuite qu'il n'y a pas de puit
-    gs.push_pretty_clause(["-P(%s,%s)" % (i,j)])
-    if not gs.solve():
-        gs.pop_clause()
+
+    # Sans classification calculée par lot, on interroge la base pour cette case
+    if classe is None:
+        classe = classify_cells(gs, [(i, j)], wfound)[(i, j)]
+    if gs.stats() is not None:
+        gs.stats().count("deduced_" + classe)
+
+ # Le Wumpus est forcément sur cette case
+    if classe == WUMPUS:
+        a, b, c = wwr.cautious_probe(i, j)
+        ajouter_clause(gs, [i,j], b)
+        return True, b, True
+
+#Il y a forcément un puit
+    if classe == PIT:
         a, b, c = wwr.cautious_probe(i, j)
         ajouter_clause(gs, [i,j], b)
         return True, b, wfound
-    else:
-        gs.pop_clause()
 
-#Enfin, on vérifie qu'il n'y a ni le Wumpus ni un puit
-    gs.push_pretty_clause(["P(%s,%s)" % (i,j), "W(%s,%s)" % (i,j)])
-    if not gs.solve():
-        gs.pop_clause()
+#Il n'y a ni le Wumpus ni un puit
+    if classe == SAFE:
         a, b, c = wwr.probe(i, j)
         ajouter_clause(gs, [i, j], b)
         return True, b, wfound
-    else:
-        gs.pop_clause()
 
     return False, None, wfound
 
 
 
+def sonde_risquee(ww, c, danger):
+    # Sonde simple seulement si son coût moyen, échec suivi d'une sonde
+    # prudente compris, reste inférieur à celui d'une sonde prudente
+    risque = danger * (COST["failed_probe"] + COST["cautious_probe"])
+    if COST["probe"] + risque < COST["cautious_probe"]:
+        a, b, c = ww.probe(c[0], c[1])
+        if a != "[KO]":
+            return b
+    a, b, c = ww.cautious_probe(c[0], c[1])
+    return b
+
+
+# États d'une case pendant le parcours (drapeaux combinables)
+INCONNUE = 0
+CONNUE = 1
+SURE = 2
+FRONTIERE = 4
+
+
 def parcours_map(succ, remove, insert, ww, gs):
     n = ww.get_n()
-    l_safe = []
-    l_nosafe = []
-    l_known = []
-    bloque = False
+    l_safe = deque()
+    l_nosafe = deque()
+    # état de chaque case i * n + j, et nombre de cases connues
+    etat = bytearray(n * n)
+    nb_connues = 0
     WumpusFound = False
-    last_l_nosafe = []
+    stats = gs.stats()
+
+    def connaitre(c):
+        nonlocal nb_connues
+        if not etat[c[0] * n + c[1]] & CONNUE:
+            etat[c[0] * n + c[1]] |= CONNUE
+            nb_connues += 1
+
+    def classer(c, b):
+        # SURE : ni odeur ni brise, les voisins peuvent être sondés sans risque
+        if "S" in b or "B" in b:
+            etat[c[0] * n + c[1]] |= FRONTIERE
+            return False
+        etat[c[0] * n + c[1]] |= SURE
+        return True
 
 
     a, b, c = ww.probe(0, 0)
-    if (b.find("S") >= 0 or b.find("B") >= 0) :
-        l_nosafe = insert([0,0], l_nosafe)
+    if classer((0, 0), b):
+        l_safe = insert((0, 0), l_safe)
     else :
-        l_safe = insert([0,0], l_safe)
-
-    while (len(l_known) != n*n):
+        l_nosafe = insert((0, 0), l_nosafe)
+
+    while nb_connues != n*n:
+        # chaque percept ajouté à la base en change la version : on compte
+        # ainsi ce que la passe a appris
+        version_passe = gs.version()
+        if stats is not None:
+            stats.count("pass")
         while l_safe:
             c_safe, l_safe = remove(l_safe)
-            if c_safe not in l_known:
-                l_known.append(c_safe)
-            for c2 in succ_inconnu(c_safe, n, l_known):
+            connaitre(c_safe)
+            for c2 in succ_inconnu(c_safe, n, etat):
                 a, b, c = ww.probe(c2[0],c2[1])
-                l_known.append(c2)
+                connaitre(c2)
                 ajouter_clause(gs, c2, b)
-                if (b.find("S") >= 0 or b.find("B") >= 0) :
-                    l_nosafe = insert(c2, l_nosafe)
-                else :
+                if classer(c2, b):
                     l_safe = insert(c2, l_safe)
+                else :
+                    l_nosafe = insert(c2, l_nosafe)
+
+        next_l_nosafe = []
+        dans_next = set()
 
-        last_l_nosafe = l_nosafe
-        next_l_nosafe=[]
+        # On classe toute la frontière en une seule interrogation du solveur
+        frontiere = [c2 for c in l_nosafe for c2 in succ_inconnu(c, n, etat)]
+        classes = classify_cells(gs, frontiere, WumpusFound)
+        version, wfound_lot = gs.version(), WumpusFound
         while l_nosafe:
             c_nosafe, l_nosafe = remove(l_nosafe)
-            if c_nosafe not in l_known:
-                l_known.append(c_nosafe)
-
-            for c2 in succ_inconnu(c_nosafe, n, l_known):
-                if bloque:
-                    bloque = False
-                    a, b, c = ww.cautious_probe(c2[0], c2[1])
-                    l_known.append(c2)
-                    ajouter_clause(gs, c2, b)
-                    if (b.find("W") >= 0):
-                        WumpusFound = True
-                    if (b.find("S") >= 0 or b.find("B") >= 0) :
-                        next_l_nosafe.append(c2)
-                    else :
+            connaitre(c_nosafe)
+
+            for c2 in succ_inconnu(c_nosafe, n, etat):
+                # une case indécise peut être devenue déductible depuis le lot
+                classe = classes.get(c2)
+                if WumpusFound != wfound_lot or (
+                    classe == UNKNOWN and gs.version() != version
+                ):
+                    classe = None
+                deduc, b, WumpusFound = clause_deducted(c2, gs, ww, WumpusFound, classe)
+                if not deduc:
+                    if c_nosafe not in dans_next:
+                        next_l_nosafe.append(c_nosafe)
+                        dans_next.add(c_nosafe)
+                else:
+                    connaitre(c2)
+                    if classer(c2, b):
                         l_safe.append(c2)
-                    
-
+                    else :
+                        next_l_nosafe.append(c2)
+                        dans_next.add(c2)
+
+        # La frontière suivante est parcourue dans l'ordre des cases
+        l_nosafe = deque(sorted(next_l_nosafe))
+        # Bloqué seulement si la passe n'a rien appris : on sonde alors la
+        # case de la frontière la moins risquée
+        appris = gs.version() - version_passe
+        if appris == 0 and nb_connues != n*n:
+            frontiere = [c2 for c in l_nosafe for c2 in succ_inconnu(c, n, etat)]
+            if frontiere:
+                c2, danger = case_moins_risquee(
+                    gs, frontiere, n, WumpusFound, RATES["pit_rate"]
+                )
+                b = sonde_risquee(ww, c2, danger)
+                if stats is not None:
+                    stats.count("blocked")
+                connaitre(c2)
+                ajouter_clause(gs, c2, b)
+                if "W" in b:
+                    WumpusFound = True
+                if classer(c2, b):
+                    l_safe.append(c2)
                 else :
-                    deduc, b, WumpusFound = clause_deducted(c2, gs, ww, WumpusFound)
-                    if not deduc:
-                        if c_nosafe not in next_l_nosafe:
-                            next_l_nosafe.append(c_nosafe)
-                    else:
-                        if c2 not in l_known:
-                            l_known.append(c2)
-                        if (b.find("S") >= 0 or b.find("B") >=0) :
-                            next_l_nosafe.append(c2)
-                        else :
-                            l_safe.append(c2)
-        
-        l_nosafe = next_l_nosafe
-        if last_l_nosafe.sort() == next_l_nosafe.sort():
-            bloque = True
-
-def succ_inconnu(c, n, l_known):
-    succ = successeur1(c, n)
-    for x in l_known:
-        if x in succ:
-            succ.remove(x)
-
-    return succ
+                    l_nosafe.append(c2)
+
+def succ_inconnu(c, n, etat):
+    return [(a, b) for a, b in voisins(c[0], c[1], n) if not etat[a * n + b] & CONNUE]
+
+# au-delà de cette distance, un fait nouveau ne change pas directement le
+# classement d'une case de la frontière
+RAYON_FAIT = 2
+
+
+def composantes_frontiere(frontiere, n, etat):
+    # deux cases de la frontière sont liées si elles touchent une même case
+    # connue à percepts : les composantes se sondent indépendamment. Cases
+    # triées dans chaque composante, composantes triées par leur plus petite
+    # case, pour que l'ordre des sondes ne dépende pas des ensembles
+    bord = {
+        (a, b)
+        for c in frontiere
+        for a, b in voisins(c[0], c[1], n)
+        if etat[a * n + b] & FRONTIERE
+    }
+    liens = [[c] for c in sorted(frontiere)]
+    liens += [[c for c in succ_inconnu(b, n, etat) if c in frontiere] for b in sorted(bord)]
+    return sorted(sorted(cases) for cases, _ in composantes(liens))
+
+
+def parcours_frontiere(ww, gs):
+    # Même exploration que parcours_map, mais incrémentale : après chaque
+    # sonde, seules les cases de la frontière proches du fait nouveau sont
+    # reclassées, au lieu de reparcourir toute la frontière. Quand plus rien
+    # ne se déduit, on sonde la case la moins risquée de plusieurs
+    # composantes indépendantes de la frontière, et non d'une seule.
+    n = ww.get_n()
+    etat = bytearray(n * n)
+    nb_connues = 0
+    l_safe = deque()
+    # cases inconnues voisines d'une case à percepts, et celles à reclasser
+    frontiere = set()
+    a_revoir = set()
+    WumpusFound = False
+    stats = gs.stats()
+
+    def apprendre(c, b):
+        nonlocal nb_connues, WumpusFound
+        etat[c[0] * n + c[1]] |= CONNUE
+        nb_connues += 1
+        frontiere.discard(c)
+        a_revoir.discard(c)
+        if "W" in b:
+            WumpusFound = True
+        if "S" in b or "B" in b:
+            etat[c[0] * n + c[1]] |= FRONTIERE
+            for c2 in succ_inconnu(c, n, etat):
+                frontiere.add(c2)
+                a_revoir.add(c2)
+        else:
+            etat[c[0] * n + c[1]] |= SURE
+            l_safe.append(c)
+        for i in range(max(0, c[0] - RAYON_FAIT), min(n, c[0] + RAYON_FAIT + 1)):
+            d = RAYON_FAIT - abs(i - c[0])
+            for j in range(max(0, c[1] - d), min(n, c[1] + d + 1)):
+                if (i, j) in frontiere:
+                    a_revoir.add((i, j))
+
+    # contrairement à parcours_map, les percepts de la case de départ sont
+    # ajoutés à la base
+    a, b, c = ww.probe(0, 0)
+    ajouter_clause(gs, (0, 0), b)
+    apprendre((0, 0), b)
+
+    while nb_connues != n * n:
+        if stats is not None:
+            stats.count("pass")
+        while l_safe:
+            c_safe = l_safe.popleft()
+            for c2 in succ_inconnu(c_safe, n, etat):
+                a, b, c = ww.probe(c2[0], c2[1])
+                ajouter_clause(gs, c2, b)
+                apprendre(c2, b)
+
+        if a_revoir:
+            # une interrogation du solveur pour toutes les cases à reclasser
+            cases = sorted(a_revoir)
+            a_revoir.clear()
+            classes = classify_cells(gs, cases, WumpusFound)
+            for c2 in cases:
+                if etat[c2[0] * n + c2[1]] & CONNUE:
+                    continue
+                deduc, b, WumpusFound = clause_deducted(
+                    c2, gs, ww, WumpusFound, classes[c2]
+                )
+                if deduc:
+                    apprendre(c2, b)
+            continue
+
+        if nb_connues == n * n or not frontiere:
+            break
+
+        # Bloqué : on sonde la case la moins risquée de chaque composante,
+        # les plus sûres d'abord ; une case trop proche d'une sonde de ce
+        # tour est laissée au tour suivant, qui profitera du fait appris
+        danger = probabilites_danger(
+            gs, sorted(frontiere), n, WumpusFound, RATES["pit_rate"]
+        )
+        groupes = composantes_frontiere(frontiere, n, etat)
+        choix = sorted((min(comp, key=danger.get) for comp in groupes), key=danger.get)
+        sondees = []
+        for c2 in choix:
+            if any(abs(c2[0] - i) + abs(c2[1] - j) <= RAYON_FAIT + 1 for i, j in sondees):
+                continue
+            sondees.append(c2)
+            b = sonde_risquee(ww, c2, danger[c2])
+            if stats is not None:
+                stats.count("blocked")
+            ajouter_clause(gs, c2, b)
+            apprendre(c2, b)
+
 
 def remove1(l):
-    return l.pop(0), l
+    return l.popleft(), l
 
 def insert1(s, l):
     l.append(s)
     return l
 
 def successeur1(c, n):
-    i = c[0]
-    j = c[1]
-    res= []
-    if i + 1 < n:
-        res.append([i + 1 , j])
-    if i - 1 >= 0:
-        res.append([i - 1 , j])
-    if j + 1 < n:
-        res.append([i , j + 1])
-    if j - 1 >= 0:
-        res.append([i , j - 1])
-    return res
+    return [[a, b] for a, b in voisins(c[0], c[1], n)]
 
 
 def tresor_liste(maze):
@@ -528,139 +713,81 @@ def mur_liste(maze):
 
 
 
-def effectuer_analyse (pos, case, end):
-    case_analyse = Case(pos)
-    case_analyse.calcul(case, end)
-    return case_analyse
-
-def effectuer_analyse2 (pos, case, openList):
-    for i in openList:
-        if i.pos == pos:
-            if (case.g + 10) < i.g:
-                i.g = case.g + 10
-                i.parent = case 
-            return i
-
-def sort(openList, case : Case):
-    old_size = len(openList)
-    indice = 0
-    if case.pos in liste_position_c(openList):
-        return openList
-    for i in openList:
-        if case.f < i.f and indice != 0:
-            openList.insert(indice, case)
-            return openList
-        indice = indice + 1
-    if old_size == len(openList):
-        openList.append(case)
-    return openList
-
-def liste_position_c(l):
-    l_pos = []
-    for i in l:
-        l_pos.append(i.pos)
-    return l_pos
-
-def succ(case : Case, end : Case, openList, pos_closelist, l_wall, n):
-    i = case.pos[0]
-    j = case.pos[1]
-    l_analyse = []
-    l_analyse_again = []
-    if i + 1 < n:
-        if ([i+1, j] not in l_wall and [i+1, j] not in pos_closelist):
-            if [i+1, j] not in liste_position_c(openList):
-                l_analyse.append([i+1 , j])
-            else:
-                l_analyse_again.append([i+1 , j])
-    if i - 1 >= 0:
-        if ([i-1, j] not in l_wall and [i-1, j] not in pos_closelist):
-            if [i-1, j] not in liste_position_c(openList):
-                l_analyse.append([i-1 , j])
-            else:
-                l_analyse_again.append([i-1 , j])
-    if j + 1 < n:
-        if ([i, j+1] not in l_wall and [i, j+1] not in pos_closelist):
-            if [i, j+1] not in liste_position_c(openList):
-                l_analyse.append([i , j+1])
-            else:
-                l_analyse_again.append([i , j+1])
-    if j - 1 >= 0:
-        if ([i, j-1] not in l_wall and [i, j-1] not in pos_closelist):
-            if [i, j-1] not in liste_position_c(openList):
-                l_analyse.append([i , j-1])
-            else:
-                l_analyse_again.append([i, j-1])
-
-    for i in l_analyse:
-        openList = sort(openList, effectuer_analyse(i, case, end))
-    for i in l_analyse_again:
-        openList = sort(openList, effectuer_analyse2(i, case, openList))
-    return openList
-
 def course_final(start : Case, end : Case, l_wall, n):
-    #On commence par regarder ceux qui n'ont pas encore été analysés
-    openList = [] 
-    #On regarde ensuite ceux qui ont déjà été analysés
-    closelist = [] 
-    res = []
-    current_case = start
-    openList.append(start)
-
-    while end.pos != current_case.pos:
-        current_case = openList[0]
-        openList = succ(current_case, end, openList, liste_position_c(closelist), l_wall, n)
-        closelist.append(openList.pop(0))
-
-        if len(openList) == 0 and end.pos != current_case.pos:
-            print("Il n'y a pas de solution possible !")
-            return res
+    # A* sur la grille : tas binaire pour la liste ouverte, coûts et cases
+    # fermées rangés dans des tableaux indexés par i * n + j
+    murs = set(map(tuple, l_wall))
+    depart = start.pos[0] * n + start.pos[1]
+    arrivee = end.pos[0] * n + end.pos[1]
+    ei, ej = end.pos[0], end.pos[1]
+
+    g = array("l", [-1]) * (n * n)
+    parent = array("l", [-1]) * (n * n)
+    ferme = bytearray(n * n)
+
+    g[depart] = 0
+    openList = [((abs(start.pos[0] - ei) + abs(start.pos[1] - ej)) * 10, 0, depart)]
+
+    while openList:
+        f, cout, c = heapq.heappop(openList)
+        cout = -cout
+        if ferme[c]:
+            continue
+        if c == arrivee:
+            break
+        ferme[c] = 1
+
+        i, j = divmod(c, n)
+        cout += 10
+        for a, b in voisins(i, j, n):
+            if (a, b) not in murs:
+                d = a * n + b
+                if not ferme[d] and (g[d] < 0 or cout < g[d]):
+                    g[d] = cout
+                    parent[d] = c
+                    h = (abs(a - ei) + abs(b - ej)) * 10
+                    # à f égal, on privilégie la case la plus avancée
+                    heapq.heappush(openList, (cout + h, -cout, d))
+    else:
+        print("Il n'y a pas de solution possible !")
+        return []
 
-    while current_case.parent != None :
-        res.append(current_case.pos)
-        current_case = current_case.parent
+    res = []
+    c = arrivee
+    while c != depart:
+        res.append([c // n, c % n])
+        c = parent[c]
     res.append(start.pos)
     return res
 
 def cheminFinal_emprunte(l_wall, l_gold, ww):
-    case_start = Case([0, 0])
-    l_final_path =[]
-    final_path = []
-    liste_case_final = []
-    l_etat = []
     n = ww.get_n()
-    nb_chemin = len(l_gold) 
-    for i in l_gold:
-        liste_case_final.append(i)
-
-    while len(l_final_path) != nb_chemin:
-        chemin = []
-        while len(liste_case_final) != 0:
-            case_gold = Case(liste_case_final.pop(0))
-            path = course_final(case_start, case_gold, l_wall, n)
-            if len(path) == 0 :
-                return path
-            
-            if len(chemin) == 0 or len(chemin) > len(path):
-                chemin = path
-        case_start = Case(chemin[0])
-        l_etat.append(chemin[0])
-        for i in l_gold:
-            if i not in l_etat:
-                liste_case_final.append(i)
-        l_final_path.append(chemin)
+    # Un parcours en largeur depuis l'origine et depuis chaque pépite donne
+    # toutes les distances utiles en une fois
+    points = [[0, 0]] + [[g[0], g[1]] for g in l_gold]
+    champs = champs_distances(points, l_wall, n)
+    distances = matrice_distances(points, champs, n)
+    if -1 in distances[0]:
+        print("Il n'y a pas de solution possible !")
+        return []
+
+    # Ordre de ramassage le plus court, puis chemin de chaque étape
+    tournee = planifier_tournee(distances)
+    l_final_path = []
+    final_path = []
+    for a, b in zip(tournee, tournee[1:]):
+        cible = points[b]
+        l_final_path.append(chemin_champ(champs[(cible[0], cible[1])], points[a], n))
 
     indice = 0
     for i in l_final_path :
-        i.reverse()
         print("Etape %s : %s" %(indice, i))
         indice = indice + 1
-        i.reverse()
 
     indice = 0
     for chemin in l_final_path:
-        chemin.reverse() 
         if indice > 0 :
-            chemin.pop(0)
+            chemin = chemin[1:]
         for case in chemin:
             final_path.append(case)
         indice = indice + 1